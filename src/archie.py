@@ -9,7 +9,7 @@ import argparse
 import sys
 import signal
 from archie.lib.engine.ai_engine import AIEngine
-from archie.services.spawn import SpawnServices
+from archie.services.spawn import SpawnServices, ServicesNotReadyException
 from archie.utils.info import run_info_command, run_version_command, __application__
 from archie.config.base import Configuration
 from archie.utils.decorators import trace_info
@@ -97,9 +97,15 @@ class ArchieLauncher():
         # Spawn services
         self._services.run()
 
-        # We wait some seconds to have services running
-        import time
-        time.sleep(5)
+        # Wait until every service is ready, do not leave them orphan if any is not
+        try:
+            self._services.wait_ready()
+        except ServicesNotReadyException:
+            self._services.stop()
+            raise
+
+        # Restart services that exit from now on
+        self._services.supervise()
 
     def run(self):
         """
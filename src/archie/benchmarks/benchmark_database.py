@@ -0,0 +1,136 @@
+# encoding:utf-8
+"""
+benchmark_database.py - Benchmark of 10k inserts through the database interface
+against the former connection per statement inserts
+"""
+
+import logging
+import sqlite3
+import tempfile
+import time
+from os import path
+from archie.utils.database import Database
+from archie.utils.statistics import SpeechToTextStats
+
+# Setting application logging level
+LOG_LEVEL = "INFO"
+
+# Rows inserted per measure
+ROWS = 10000
+
+# Speech to text table schema
+SCHEMA = "CREATE TABLE speech_to_text (datetime TEXT, day INTEGER, month INTEGER, year INTEGER, query TEXT)"
+
+
+def configure_logger():
+    """
+    Method to configure logging
+    """
+    logargs = {
+        'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        'datefmt': '%Y-%m-%d %H:%M:%S'}
+
+    logargs["level"] = LOG_LEVEL
+
+    logging.basicConfig(**logargs)
+
+    return logging.getLogger("Database benchmark")
+
+
+def create_database(folder, name):
+    """
+    Function to create an empty statistics database
+    """
+    database = path.join(folder, name)
+    conn = sqlite3.connect(database)
+    conn.execute(SCHEMA)
+    conn.close()
+
+    return database
+
+
+def legacy_insert(database, rows):
+    """
+    Former insert: one connection and one commit per row, values formatted into SQL
+    """
+    for now, day, month, year, query in rows:
+        conn = sqlite3.connect(database)
+        with conn:
+            conn.execute(f"INSERT INTO speech_to_text VALUES ('{now}', {day}, {month}, {year}, '{query}')")
+        conn.close()
+
+
+def reused_insert(database, rows):
+    """
+    Parameterized insert per row on the reused connection, one commit per row
+    """
+    db = Database(database)
+    for row in rows:
+        db.insert("speech_to_text", row)
+    db.close()
+
+
+def transaction_insert(database, rows):
+    """
+    Parameterized insert per row in one transaction
+    """
+    db = Database(database)
+    with db.transaction():
+        for row in rows:
+            db.insert("speech_to_text", row)
+    db.close()
+
+
+def bulk_insert(database, rows):
+    """
+    executemany insert in one transaction
+    """
+    db = Database(database)
+    db.insert_many("speech_to_text", rows)
+    db.close()
+
+
+def main():
+    """ Main function """
+
+    # Configure logger
+    logger = configure_logger()
+
+    # Queries with quotes broke the former insert
+    rows = [("18-10-2026 10:00:00", 18, 10, 2026, f"hola archie request {i}") for i in range(ROWS)]
+
+    with tempfile.TemporaryDirectory() as folder:
+        results = {}
+        for name, function in [("legacy", legacy_insert), ("reused connection", reused_insert),
+                               ("transaction", transaction_insert), ("executemany", bulk_insert)]:
+            database = create_database(folder, name.replace(" ", "_") + ".db")
+            start = time.perf_counter()
+            function(database, rows)
+            results[name] = time.perf_counter() - start
+
+        for name, elapsed in results.items():
+            logger.info(f"{name:>17} - {ROWS} inserts: {elapsed * 1000:9.1f} ms, "
+                        f"{ROWS / elapsed:9.0f} rows/s, speedup: {results['legacy'] / elapsed:6.1f}x")
+
+        # Statistics interface, one request per call and batched with counters
+        database = create_database(folder, "stats.db")
+        stats = SpeechToTextStats(folder, "stats.db")
+        stats.migrate()
+        queries = [f"qué tiempo hace en l'Hospitalet {i}" for i in range(ROWS)]
+
+        start = time.perf_counter()
+        for query in queries:
+            stats.update(query)
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        stats.update_many(queries)
+        batch = time.perf_counter() - start
+
+        logger.info(f"SpeechToTextStats - update: {single * 1000:.1f} ms, update_many: {batch * 1000:.1f} ms, "
+                    f"current month requests: {stats.get_current_month_requests()}")
+        stats.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# encoding:utf-8
+"""
+benchmark_delta.py - Micro-benchmark comparing the vectorized delta computation
+against the former frame by frame loop
+"""
+
+import logging
+import timeit
+import numpy as np
+from archie.lib.recognition.speaker_features import SpeakerFeatures
+
+# Setting application logging level
+LOG_LEVEL = "INFO"
+
+# Input durations to benchmark in seconds (10s, 60s and 10min)
+DURATIONS = [10, 60, 600]
+
+# Frames per second produced by a 10ms window step
+FRAMES_PER_SECOND = 100
+
+# Number of repetitions per measure
+REPEAT = 5
+
+
+def configure_logger():
+    """
+    Method to configure logging
+    """
+    logargs = {
+        'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        'datefmt': '%Y-%m-%d %H:%M:%S'}
+
+    logargs["level"] = LOG_LEVEL
+
+    logging.basicConfig(**logargs)
+
+    return logging.getLogger("Delta benchmark")
+
+
+def loop_delta(array):
+    """
+    Former frame by frame delta computation (N=2, 20 columns)
+    """
+    rows, cols = array.shape
+    deltas = np.zeros((rows, 20))
+    N = 2
+    for i in range(rows):
+        index = []
+        j = 1
+        while j <= N:
+            if i-j < 0:
+                first = 0
+            else:
+                first = i-j
+            if i+j > rows - 1:
+                second = rows - 1
+            else:
+                second = i+j
+            index.append((second, first))
+            j += 1
+        deltas[i] = (array[index[0][0]]-array[index[0][1]] +
+                     (2 * (array[index[1][0]]-array[index[1][1]]))) / 10
+    return deltas
+
+
+def main():
+    """ Main function """
+
+    # Configure logger
+    logger = configure_logger()
+
+    sf = SpeakerFeatures(None, 16000)
+    rng = np.random.default_rng(0)
+
+    for duration in DURATIONS:
+        features = rng.standard_normal((duration * FRAMES_PER_SECOND, 20))
+
+        # Results have to be identical
+        if not np.array_equal(loop_delta(features), sf._calculate_delta(features)):
+            logger.error(f"Delta mismatch for {duration}s input!")
+            continue
+
+        loop_time = min(timeit.repeat(
+            lambda: loop_delta(features), number=1, repeat=REPEAT))
+        vector_time = min(timeit.repeat(
+            lambda: sf._calculate_delta(features), number=1, repeat=REPEAT))
+
+        logger.info(
+            f"{duration:>4}s ({features.shape[0]} frames) - loop: {loop_time * 1000:.2f} ms, "
+            f"vectorized: {vector_time * 1000:.2f} ms, speedup: {loop_time / vector_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
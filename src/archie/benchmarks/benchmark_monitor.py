@@ -0,0 +1,110 @@
+# encoding:utf-8
+"""
+benchmark_monitor.py - Load test of the monitor service stats endpoints
+"""
+
+import argparse
+import logging
+import threading
+import time
+from urllib import parse
+import numpy as np
+import requests
+
+# Setting application logging level
+LOG_LEVEL = "INFO"
+
+# Query sent by the load test
+QUERY = "hola archie qué tiempo hace mañana"
+
+
+def configure_logger():
+    """
+    Method to configure logging
+    """
+    logargs = {
+        'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        'datefmt': '%Y-%m-%d %H:%M:%S'}
+
+    logargs["level"] = LOG_LEVEL
+
+    logging.basicConfig(**logargs)
+
+    return logging.getLogger("Monitor benchmark")
+
+
+def client(url, mode, batch_size, deadline, latencies):
+    """
+    Function that sends requests until deadline, appending their latencies
+    """
+    session = requests.Session()
+    update_url = f"{url}/stats/requests/update/{parse.quote_plus(QUERY)}"
+    batch = {"queries": [QUERY] * batch_size}
+
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        if mode == "single":
+            res = session.get(update_url)
+        elif mode == "batch":
+            res = session.post(f"{url}/stats/requests/update", json=batch)
+        else:
+            res = session.get(f"{url}/stats/requests/getcurrent")
+        res.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+    session.close()
+
+
+def main():
+    """ Main function """
+
+    # Configure logger
+    logger = configure_logger()
+
+    # Configure arguments
+    parser = argparse.ArgumentParser(description="Load test the monitor service")
+    parser.add_argument('--host', default="localhost",
+                        help="Monitor service host.")
+    parser.add_argument('--port', default=30153, type=int,
+                        help="Monitor service port.")
+    parser.add_argument('-m', '--mode', default="single",
+                        choices=["single", "batch", "current"],
+                        help="single: one query per GET update, batch: POST update, current: GET getcurrent.")
+    parser.add_argument('-b', '--batch_size', default=20, type=int,
+                        help="Queries per POST in batch mode.")
+    parser.add_argument('-c', '--clients', default=8, type=int,
+                        help="Concurrent clients.")
+    parser.add_argument('-d', '--duration', default=10, type=float,
+                        help="Test duration in seconds.")
+
+    args = parser.parse_args()
+
+    url = f"http://{args.host}:{args.port}"
+    deadline = time.monotonic() + args.duration
+    latencies = []
+
+    clients = [threading.Thread(target=client,
+                                args=(url, args.mode, args.batch_size, deadline, latencies))
+               for _ in range(args.clients)]
+    start = time.monotonic()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    if not latencies:
+        logger.error("No request completed")
+        return
+
+    queries = len(latencies) * (args.batch_size if args.mode == "batch" else 1)
+    logger.info(f"{args.mode} - {args.clients} clients, {len(latencies)} requests in {elapsed:.1f}s: "
+                f"{len(latencies) / elapsed:.1f} requests/s")
+    if args.mode != "current":
+        logger.info(f"{queries / elapsed:.1f} queries/s stored")
+    logger.info(f"Latency p50: {np.percentile(latencies, 50) * 1000:.1f} ms, "
+                f"p99: {np.percentile(latencies, 99) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# encoding:utf-8
+"""
+benchmark_scoring.py - Micro-benchmark comparing batched model bank scoring
+against scoring each speaker GMM in a loop
+"""
+
+import logging
+import timeit
+import warnings
+import numpy as np
+from sklearn.mixture import GaussianMixture as GMM
+from archie.lib.recognition.model_bank import ModelBank
+
+warnings.filterwarnings("ignore")
+
+# Setting application logging level
+LOG_LEVEL = "INFO"
+
+# Number of enrolled speakers to benchmark
+SPEAKERS = [10, 50, 200]
+
+# Frames of the utterance to identify (3s at 10ms step)
+FRAMES = 300
+
+# Number of repetitions per measure
+REPEAT = 5
+
+
+def configure_logger():
+    """
+    Method to configure logging
+    """
+    logargs = {
+        'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        'datefmt': '%Y-%m-%d %H:%M:%S'}
+
+    logargs["level"] = LOG_LEVEL
+
+    logging.basicConfig(**logargs)
+
+    return logging.getLogger("Scoring benchmark")
+
+
+def loop_score(models, features):
+    """
+    Former per speaker scoring
+    """
+    log_likelihood = np.zeros(len(models))
+
+    for i in range(len(models)):
+        gmm, _ = models[i]
+        log_likelihood[i] = gmm.score(features)
+
+    return log_likelihood
+
+
+def main():
+    """ Main function """
+
+    # Configure logger
+    logger = configure_logger()
+
+    rng = np.random.default_rng(0)
+    features = rng.standard_normal((FRAMES, 40))
+
+    # Fit one cheap model and reuse its shapes with random parameters per speaker
+    template = GMM(n_components=16, covariance_type='diag', max_iter=5).fit(
+        rng.standard_normal((1000, 40)))
+
+    for num_speakers in SPEAKERS:
+        models = []
+        for i in range(num_speakers):
+            gmm = GMM(n_components=16, covariance_type='diag')
+            gmm.weights_ = template.weights_
+            gmm.means_ = template.means_ + rng.standard_normal(template.means_.shape) * 0.1
+            gmm.covariances_ = template.covariances_
+            gmm.precisions_ = 1. / template.covariances_
+            gmm.precisions_cholesky_ = np.sqrt(gmm.precisions_)
+            models.append((gmm, f"speaker{i}"))
+
+        bank = ModelBank.from_gmms(models)
+
+        if not np.allclose(loop_score(models, features), bank.score(features)):
+            logger.error(f"Score mismatch for {num_speakers} speakers!")
+            continue
+
+        loop_time = min(timeit.repeat(
+            lambda: loop_score(models, features), number=1, repeat=REPEAT))
+        bank_time = min(timeit.repeat(
+            lambda: bank.score(features), number=1, repeat=REPEAT))
+
+        logger.info(
+            f"{num_speakers:>4} speakers - loop: {loop_time * 1000:.2f} ms, "
+            f"batched: {bank_time * 1000:.2f} ms, speedup: {loop_time / bank_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
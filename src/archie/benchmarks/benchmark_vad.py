@@ -0,0 +1,146 @@
+# encoding:utf-8
+"""
+benchmark_vad.py - Benchmark of the voice activity detector over recorded wav files
+"""
+
+import argparse
+import logging
+import time
+from os import listdir, path
+import numpy as np
+from scipy.io.wavfile import read
+from archie.lib.engine.voice_activity import VoiceActivityDetector
+
+# Setting application logging level
+LOG_LEVEL = "INFO"
+
+# Samples per chunk, as read from the microphone
+CHUNK = 1024
+
+
+def configure_logger():
+    """
+    Method to configure logging
+    """
+    logargs = {
+        'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        'datefmt': '%Y-%m-%d %H:%M:%S'}
+
+    logargs["level"] = LOG_LEVEL
+
+    logging.basicConfig(**logargs)
+
+    return logging.getLogger("VAD benchmark")
+
+
+def load_labels(wav_file):
+    """
+    Function to load reference speech segments of a wav file.
+    They are read from a .txt file next to it with one "start end" line in seconds per segment.
+    @Return list of Tuple (start, end) or None if there is no labels file
+    """
+    labels_file = path.splitext(wav_file)[0] + ".txt"
+    if not path.exists(labels_file):
+        return None
+
+    with open(labels_file) as labels:
+        return [tuple(float(value) for value in line.split()[:2])
+                for line in labels if line.strip()]
+
+
+def run(wav_file, hangover_ms):
+    """
+    Function to feed a wav file to the detector chunk by chunk
+    @Return Tuple (segments, emission times, audio seconds, processing seconds)
+    """
+    rate, audio = read(wav_file)
+    if audio.ndim > 1:
+        audio = audio[:, 0]
+    audio = audio.astype(np.int16)
+
+    vad = VoiceActivityDetector(rate, hangover_ms=hangover_ms)
+    segments = []
+    emitted = []
+    elapsed = 0.0
+
+    for start in range(0, len(audio), CHUNK):
+        chunk = audio[start:start + CHUNK]
+        begin = time.perf_counter()
+        found = vad.process(chunk)
+        elapsed += time.perf_counter() - begin
+        for _ in found:
+            segments.append(tuple(bound / rate for bound in vad.last_bounds))
+            # Audio time when the segment became available
+            emitted.append((start + len(chunk)) / rate)
+
+    if vad.flush() is not None:
+        segments.append(tuple(bound / rate for bound in vad.last_bounds))
+        emitted.append(len(audio) / rate)
+
+    return segments, emitted, len(audio) / rate, elapsed
+
+
+def main():
+    """ Main function """
+
+    # Configure logger
+    logger = configure_logger()
+
+    # Configure arguments
+    parser = argparse.ArgumentParser(description="Benchmark voice activity detection over wav files")
+    parser.add_argument('wav_path',
+                        help="Path with wav recordings. Optional .txt labels with 'start end' lines in seconds.")
+    parser.add_argument('--hangover',
+                        default=800, type=int,
+                        help="Silence in ms needed to end a segment.")
+
+    args = parser.parse_args()
+
+    total_audio = 0.0
+    total_time = 0.0
+    onset_errors = []
+    clipped = 0
+
+    for fname in sorted(listdir(args.wav_path)):
+        if not fname.endswith('.wav'):
+            continue
+        wav_file = path.join(args.wav_path, fname)
+
+        segments, emitted, duration, elapsed = run(wav_file, args.hangover)
+        total_audio += duration
+        total_time += elapsed
+
+        logger.info(f"{fname} ({duration:.1f}s) - {len(segments)} segments, "
+                    f"real time factor: {elapsed / duration:.4f}")
+        for (start, end), emission in zip(segments, emitted):
+            logger.info(f"  {start:7.2f}s - {end:7.2f}s, available {emission - end:.2f}s after the end")
+
+        labels = load_labels(wav_file)
+        if labels is None:
+            continue
+
+        # Match each reference segment with the closest detected onset
+        for label_start, label_end in labels:
+            if not segments:
+                logger.warning(f"  Missed segment {label_start:.2f}s - {label_end:.2f}s")
+                continue
+            start = min((start for start, _ in segments), key=lambda value: abs(value - label_start))
+            onset_errors.append(start - label_start)
+            if start > label_start:
+                clipped += 1
+
+        logger.info(f"  {len(labels)} labeled segments, {len(segments)} detected")
+
+    if not total_audio:
+        logger.error(f"No wav files found in {args.wav_path}")
+        return
+
+    logger.info(f"Total: {total_audio:.1f}s of audio processed in {total_time * 1000:.1f} ms "
+                f"(real time factor {total_time / total_audio:.4f})")
+    if onset_errors:
+        logger.info(f"Onset error: mean {np.mean(onset_errors) * 1000:.0f} ms, "
+                    f"max {np.max(np.abs(onset_errors)) * 1000:.0f} ms, clipped onsets: {clipped}/{len(onset_errors)}")
+
+
+if __name__ == "__main__":
+    main()
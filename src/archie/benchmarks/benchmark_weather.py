@@ -0,0 +1,164 @@
+# encoding:utf-8
+"""
+benchmark_weather.py - Latency benchmark of weather_rain predictions, per query
+"""
+
+import argparse
+import csv
+import logging
+import threading
+import time
+from os import path
+import numpy as np
+import requests
+from urllib import parse
+
+# Setting application logging level
+LOG_LEVEL = "INFO"
+
+# weather_rain service folder
+SERVICE_PATH = path.join(path.dirname(path.dirname(__file__)), "services", "weather_rain")
+
+
+def configure_logger():
+    """
+    Method to configure logging
+    """
+    logargs = {
+        'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        'datefmt': '%Y-%m-%d %H:%M:%S'}
+
+    logargs["level"] = LOG_LEVEL
+
+    logging.basicConfig(**logargs)
+
+    return logging.getLogger("Weather benchmark")
+
+
+def load_queries():
+    """
+    Function to load benchmark queries from the training samples
+    """
+    with open(path.join(SERVICE_PATH, "data", "train.csv"), encoding="utf-8-sig") as samples:
+        return [row["comment_text"] for row in csv.DictReader(samples, delimiter=";")]
+
+
+def measure(function, queries):
+    """
+    Function to time function on every query
+    @Return list of latencies in seconds
+    """
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        function(query)
+        latencies.append(time.perf_counter() - start)
+
+    return latencies
+
+
+def report(logger, name, latencies):
+    """
+    Function to log latency percentiles
+    """
+    logger.info(f"{name} - {len(latencies)} queries, p50: {np.percentile(latencies, 50) * 1000:.1f} ms, "
+                f"p99: {np.percentile(latencies, 99) * 1000:.1f} ms, mean: {np.mean(latencies) * 1000:.1f} ms")
+
+
+def wait_ready(url, timeout):
+    """
+    Function to poll service readiness
+    @Return seconds until ready
+    """
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        try:
+            if requests.get(f"{url}/ready", timeout=1).status_code == 200:
+                return time.monotonic() - start
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.1)
+
+    raise TimeoutError(f"Service not ready after {timeout}s")
+
+
+def main():
+    """ Main function """
+
+    # Configure logger
+    logger = configure_logger()
+
+    # Configure arguments
+    parser = argparse.ArgumentParser(description="Benchmark weather_rain prediction latency")
+    parser.add_argument('--host', default="localhost",
+                        help="weather_rain service host.")
+    parser.add_argument('--port', default=30152, type=int,
+                        help="weather_rain service port.")
+    parser.add_argument('-n', '--queries', default=100, type=int,
+                        help="Number of queries.")
+    parser.add_argument('-c', '--clients', default=1, type=int,
+                        help="Concurrent clients querying the service.")
+    parser.add_argument('--in_process', action='store_true',
+                        help="Compare loading the model per query against the resident and NumPy models, without the service.")
+
+    args = parser.parse_args()
+
+    queries = (load_queries() * args.queries)[:args.queries]
+
+    if args.in_process:
+        numpy_model_file = path.join(SERVICE_PATH, "models", "model_weather_rain.npz")
+        if path.exists(numpy_model_file):
+            from archie.services.weather_rain.numpy_predict import NumpyPredict
+
+            predictor = NumpyPredict(numpy_model_file)
+            start = time.perf_counter()
+            predictor.load()
+            predictor.warmup()
+            logger.info(f"NumPy model loaded and warmed up in {(time.perf_counter() - start) * 1000:.0f} ms")
+            report(logger, "NumPy model", measure(lambda query: predictor.predict([query]), queries))
+
+        # Imported here, so the service can be benchmarked without TensorFlow installed
+        from archie.services.weather_rain.predict import Predict
+
+        model_file = path.join(SERVICE_PATH, "models", "model_weather_rain.mdl")
+        tokenizer_file = path.join(SERVICE_PATH, "models", "tokenizer_weather_rain.mdl")
+
+        # Former behavior, model and tokenizer loaded for every query
+        reload = measure(lambda query: Predict(model_file, tokenizer_file, value=[query]).run(),
+                         queries[:min(10, len(queries))])
+        report(logger, "load per query", reload)
+
+        predictor = Predict(model_file, tokenizer_file)
+        start = time.perf_counter()
+        predictor.load()
+        predictor.warmup()
+        logger.info(f"Resident model loaded and warmed up in {(time.perf_counter() - start) * 1000:.0f} ms")
+        report(logger, "resident model", measure(lambda query: predictor.predict([query]), queries))
+        return
+
+    url = f"http://{args.host}:{args.port}"
+    logger.info(f"Service ready after {wait_ready(url, 120):.1f}s")
+
+    # Every client sends its share of queries on its own connection
+    latencies = []
+
+    def client(share):
+        session = requests.Session()
+        latencies.extend(measure(
+            lambda query: session.get(f"{url}/predict/{parse.quote_plus(query)}").raise_for_status(), share))
+
+    clients = [threading.Thread(target=client, args=(queries[i::args.clients],))
+               for i in range(args.clients)]
+    start = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    report(logger, f"service ({args.clients} clients)", latencies)
+    logger.info(f"Throughput: {len(latencies) / elapsed:.1f} queries/s")
+
+
+if __name__ == "__main__":
+    main()
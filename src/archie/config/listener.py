@@ -22,13 +22,17 @@ class ListenerConfig():
         self._timeout = data["timeout"]
         self._sounds_path = path.join(data_path, data["sounds_path"])
         self._google_cloud_credentials = path.join(data_path, data["google_cloud_credentials"])
+        self._streaming = data["streaming"]
+        self._vad = data["vad"]
+        self._persistent_stream = data["persistent_stream"]
+        self._fake_device = path.join(data_path, data["fake_device"]) if data["fake_device"] else None
 
     def __repr__(self):
         """
         Return a printed version
         """
-        return "%s(language=%r, audio rate=%r, adjust for noise=%r, microphone index=%r, timeout=%r, sounds path=%r" % (
-            self.__class__.__name__, self._language, self._audio_rate, self._adjust_for_noise, self._microphone_index, self._timeout, self._sounds_path)
+        return "%s(language=%r, audio rate=%r, adjust for noise=%r, microphone index=%r, timeout=%r, sounds path=%r, streaming=%r, vad=%r, persistent stream=%r, fake device=%r" % (
+            self.__class__.__name__, self._language, self._audio_rate, self._adjust_for_noise, self._microphone_index, self._timeout, self._sounds_path, self._streaming, self._vad, self._persistent_stream, self._fake_device)
 
     @property
     def language(self):
@@ -78,3 +82,31 @@ class ListenerConfig():
         Return google_cloud_credentials
         """
         return self._google_cloud_credentials
+
+    @property
+    def streaming(self):
+        """
+        Return streaming
+        """
+        return self._streaming
+
+    @property
+    def vad(self):
+        """
+        Return vad
+        """
+        return self._vad
+
+    @property
+    def persistent_stream(self):
+        """
+        Return persistent_stream
+        """
+        return self._persistent_stream
+
+    @property
+    def fake_device(self):
+        """
+        Return fake_device
+        """
+        return self._fake_device
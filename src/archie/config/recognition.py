@@ -20,13 +20,18 @@ class RecognitionConfig():
         self._min_train_samples = data["min_train_samples"]
         self._corpus_path = path.join(data_path, data["corpus_path"])
         self._temp_path = path.join(data_path, data["temp_path"])
+        self._llr_threshold = data["llr_threshold"]
+        self._watch_interval = data["watch_interval"]
+        self._wake_word_path = path.join(data_path, data["wake_word_path"])
+        self._wake_word_threshold = data["wake_word_threshold"]
+        self._wake_word_deviations = data["wake_word_deviations"]
 
     def __repr__(self):
         """
         Return a printed version
         """
-        return "%s(models path=%r, samples path=%r, min train samples=%r, corpus path=%r, temp_path=%r)" % (
-            self.__class__.__name__, self._models_path, self._samples_path, self._min_train_samples, self._corpus_path, self._temp_path)
+        return "%s(models path=%r, samples path=%r, min train samples=%r, corpus path=%r, temp_path=%r, llr threshold=%r, watch interval=%r, wake word path=%r, wake word threshold=%r, wake word deviations=%r)" % (
+            self.__class__.__name__, self._models_path, self._samples_path, self._min_train_samples, self._corpus_path, self._temp_path, self._llr_threshold, self._watch_interval, self._wake_word_path, self._wake_word_threshold, self._wake_word_deviations)
 
     @property
     def models_path(self):
@@ -62,3 +67,38 @@ class RecognitionConfig():
         Return temp_path
         """
         return self._temp_path
+
+    @property
+    def llr_threshold(self):
+        """
+        Return llr_threshold
+        """
+        return self._llr_threshold
+
+    @property
+    def watch_interval(self):
+        """
+        Return watch_interval
+        """
+        return self._watch_interval
+
+    @property
+    def wake_word_path(self):
+        """
+        Return wake_word_path
+        """
+        return self._wake_word_path
+
+    @property
+    def wake_word_threshold(self):
+        """
+        Return wake_word_threshold
+        """
+        return self._wake_word_threshold
+
+    @property
+    def wake_word_deviations(self):
+        """
+        Return wake_word_deviations
+        """
+        return self._wake_word_deviations
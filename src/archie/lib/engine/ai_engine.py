@@ -8,11 +8,11 @@ import logging
 import pathlib
 import os
 from sys import path
-from datetime import datetime
-from os import path, remove
+from os import path
 from typing import Dict, Tuple
 from archie.lib.actions.weather import WeatherInterface, WeatherInfoCurrent, WeatherInfoDay, WeatherInfoList
 from archie.lib.recognition.speaker_recognition import SpeakerRecognition
+from archie.lib.recognition.wake_word import WakeWordDetector, WakeWordTemplatesNotFoundException
 from archie.config.base import Configuration
 from archie.config.corpus import Corpus
 from archie.lib.engine.listener_engine import (Listener,
@@ -24,6 +24,7 @@ from archie.lib.actions.rae import RaeInterface
 from archie.services.service_interface import ServiceInterface
 from archie.lib.engine.speaker_engine import SpeakerEngine, SpeakerEngineNotFoundException
 from archie.utils.decorators import trace_info
+from archie.utils.stats_reporter import StatsReporter
 
 
 class AIEngine():
@@ -81,29 +82,31 @@ class AIEngine():
                 self._logger.debug("Step: LISTENING_NOT_ACTIVE")
                 try:
                     found = False
-                    # Wait for orders
-                    query, audio = self._listener.listen(play_sound=False)
-
-                    # If activation_token:
-                    # Serching for query in defined actions
-                    for token in self._corpus_base.activation_tokens:
-                        if token in query.lower():
-                            found = True
-                            break
+                    if self._wake_word is not None:
+                        # Spot wake word on device, no cloud recognition
+                        audio = self._listener.capture()
+                        found = self._wake_word.detect(
+                            audio.get_raw_data(convert_width=2), audio.sample_rate)
+                    else:
+                        # Wait for orders
+                        query, audio = self._listener.listen(play_sound=False)
+
+                        # If activation_token:
+                        # Serching for query in defined actions
+                        for token in self._corpus_base.activation_tokens:
+                            if token in query.lower():
+                                found = True
+                                break
 
                     if found:
-                        # Create temp file for audio
-                        temp_file = self._get_temp_file(audio)
                         try:
-                            # Try to recognize speaker
-                            speaker = self._speaker_recognition.find_speaker(
-                                temp_file)
+                            # Try to recognize speaker
+                            speaker = self._speaker_recognition.find_speaker_from_buffer(
+                                audio.frame_data, audio.sample_rate, audio.sample_width)
 
                             # Saying hello to known speaker
                             self._speaker.say(
                                 self._corpus_base.presentation.replace("$speaker$", speaker))
-                            # Remove file
-                            remove(temp_file)
 
                         except Exception as e:
                             self._logger.warning(f"Speaker unknown: {e}")
@@ -195,6 +198,15 @@ class AIEngine():
         """
         self._run = False
 
+        # Stop watching speaker models
+        self._speaker_recognition.stop_watching()
+
+        # Close microphone capture
+        self._listener.close()
+
+        # Flush pending stats
+        self._stats_reporter.close()
+
     @trace_info("Loading corpus ...")
     def _initialize_corpus(self):
         """
@@ -213,12 +225,19 @@ class AIEngine():
         """
         method to initialize listener
         """
+        # Initialize speech to text stats reporter to the monitor service
+        monitor = self._config.services.services.get("monitor", {})
+        self._stats_reporter = StatsReporter(monitor.get("host", "localhost"), monitor.get("port", 30153))
+        self._stats_reporter.start()
+
         # TODO: db_path has to be passed as argument. Maybe as a global config section for database
         # Initialize listener engine
         self._listener = Listener(self._config.listener.microphone_index,
                                   self._config.listener.audio_rate, self._config.listener.adjust_for_noise,
                                   self._config.listener.sounds_path, r"/Users/marco/Documents/Proyectos/P017-Assistant/archie/data/db", 
-                                  self._config.listener.language)
+                                  self._config.listener.language, self._config.listener.streaming,
+                                  self._config.listener.vad, self._config.listener.persistent_stream,
+                                  self._config.listener.fake_device, self._stats_reporter)
         # Set listener timeout
         self._listener_timeout = self._config.listener.timeout
 
@@ -252,11 +271,26 @@ class AIEngine():
 
         # Initialize speaker recognition
         self._speaker_recognition = SpeakerRecognition(
-            self._config.recognition.models_path)
+            self._config.recognition.models_path, self._config.recognition.llr_threshold,
+            self._config.recognition.watch_interval)
 
         # Set temporary path
         self._temp_path = self._config.recognition.temp_path
 
+        # Initialize on-device wake word detector
+        self._wake_word = None
+        wake_word_path = self._config.recognition.wake_word_path
+        if path.isdir(wake_word_path):
+            try:
+                self._wake_word = WakeWordDetector(
+                    wake_word_path, self._config.recognition.wake_word_threshold,
+                    self._config.recognition.wake_word_deviations)
+            except WakeWordTemplatesNotFoundException as e:
+                self._logger.warning(f"Wake word detector disabled: {e}")
+        else:
+            self._logger.warning(
+                f"Wake word path {wake_word_path} not found. Activation tokens are recognized in the cloud.")
+
     @trace_info("Getting information from services ...")
     def _get_services(self) -> Dict:
         """
@@ -283,16 +317,6 @@ class AIEngine():
 
         return (service.get("host"), service.get("port"))
 
-    def _get_temp_file(self, audio):
-        """
-        Create a temporary audio file
-        """
-        audio_filename = datetime.now().strftime("%Y%m%d_%H%M%S") + ".wav"
-        with open(path.join(self._temp_path, audio_filename), "wb") as temp_file:
-            temp_file.write(audio.get_wav_data())
-
-        return path.join(self._temp_path, audio_filename)
-
     def _launch_action(self, action, query):
         """
         Method to launch defined actions
@@ -0,0 +1,421 @@
+# encoding:utf-8
+"""
+audio_capture.py - File that contains persistent audio capture classes
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+import numpy as np
+import speech_recognition as sr
+from scipy.io.wavfile import read
+
+
+class AudioCaptureStoppedException(Exception):
+    """ Custom exception for reading from a stopped capture """
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}"
+
+
+class AudioRingBuffer():
+    """
+    Class to share 16 bits PCM samples between one writer and its readers without locks.
+    The writer only publishes the total of samples written after copying them, and
+    every reader keeps its own position, so no state is shared for writing.
+    Readers left behind by more than the capacity lose the oldest samples.
+    """
+
+    def __init__(self, capacity) -> None:
+        """
+        Default constructor
+        @capacity: number of samples kept
+        """
+        self._buffer = np.zeros(capacity, dtype=np.int16)
+        self._capacity = capacity
+        # Total of samples written and size of the write in progress. Only the writer updates them.
+        self._written = 0
+        self._writing = 0
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, capacity: {self._capacity}, written: {self._written}"
+
+    @property
+    def capacity(self):
+        """
+        Return capacity
+        """
+        return self._capacity
+
+    @property
+    def written(self):
+        """
+        Return written
+        """
+        return self._written
+
+    def write(self, samples):
+        """
+        Method to append samples, overwriting the oldest ones
+        """
+        count = len(samples)
+        written = self._written
+        if count > self._capacity:
+            written += count - self._capacity
+            samples = samples[-self._capacity:]
+            count = self._capacity
+
+        # Announce the region about to be overwritten
+        self._writing = count
+        start = written % self._capacity
+        first = min(count, self._capacity - start)
+        self._buffer[start:start + first] = samples[:first]
+        self._buffer[:count - first] = samples[first:]
+
+        # Publish samples once copied
+        self._written = written + count
+        self._writing = 0
+
+    def read(self, position, count):
+        """
+        Method to read available samples from a reader position
+        @Return Tuple (samples, next position)
+        """
+        while True:
+            # Skip samples overwritten or being overwritten
+            position = max(position, self._oldest())
+            available = min(count, self._written - position)
+
+            start = position % self._capacity
+            first = min(available, self._capacity - start)
+            samples = np.concatenate((self._buffer[start:start + first],
+                                      self._buffer[:available - first]))
+
+            # Copy is valid if the writer did not wrap over it meanwhile
+            if position >= self._oldest():
+                return samples, position + available
+
+    def _oldest(self):
+        """
+        Method to get the position of the oldest sample safe to read
+        """
+        return self._written + self._writing - self._capacity
+
+
+class MicrophoneBackend():
+    """
+    Class to read chunks from a PortAudio input device
+    """
+
+    def __init__(self, device_index=None) -> None:
+        """
+        Default constructor
+        """
+        self._microphone = sr.Microphone(device_index=device_index)
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, sample rate: {self.sample_rate}"
+
+    @property
+    def sample_rate(self):
+        """
+        Return sample_rate
+        """
+        return self._microphone.SAMPLE_RATE
+
+    @property
+    def chunk(self):
+        """
+        Return chunk
+        """
+        return self._microphone.CHUNK
+
+    def open(self):
+        """
+        Method to open the input stream
+        """
+        self._microphone.__enter__()
+
+    def read(self):
+        """
+        Method to read next chunk as raw 16 bits PCM bytes
+        """
+        return self._microphone.stream.read(self._microphone.CHUNK)
+
+    def close(self):
+        """
+        Method to close the input stream
+        """
+        self._microphone.__exit__(None, None, None)
+
+
+class FakeBackend():
+    """
+    Class to simulate an input device without hardware.
+    It plays queued audio at device pace and silence when nothing is queued.
+    Out of realtime, queued audio is played at once and silence at device pace.
+    """
+
+    def __init__(self, audio=None, sample_rate=16000, chunk=1024, realtime=True) -> None:
+        """
+        Default constructor
+        @audio: wav file or NumPy array queued at start
+        @realtime: wait chunk duration between reads like a device
+        """
+        self._sample_rate = sample_rate
+        self._chunk = chunk
+        self._realtime = realtime
+        # Queued chunks. deque appends and pops are thread safe.
+        self._queue = deque()
+        self._next_read = None
+
+        if audio is not None:
+            self.feed(audio)
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, sample rate: {self._sample_rate}, queued chunks: {len(self._queue)}"
+
+    @property
+    def sample_rate(self):
+        """
+        Return sample_rate
+        """
+        return self._sample_rate
+
+    @property
+    def chunk(self):
+        """
+        Return chunk
+        """
+        return self._chunk
+
+    def feed(self, audio):
+        """
+        Method to queue audio as if it was said in front of the device
+        @audio: wav file or NumPy array at backend sample rate
+        """
+        if isinstance(audio, str):
+            self._sample_rate, audio = read(audio)
+            if audio.ndim > 1:
+                audio = audio[:, 0]
+
+        audio = np.asarray(audio, dtype=np.int16)
+        for start in range(0, len(audio), self._chunk):
+            chunk = audio[start:start + self._chunk]
+            self._queue.append(np.pad(chunk, (0, self._chunk - len(chunk))).tobytes())
+
+    def open(self):
+        """
+        Method to open the fake device
+        """
+        self._next_read = time.monotonic()
+
+    def read(self):
+        """
+        Method to read next chunk as raw 16 bits PCM bytes
+        """
+        if self._realtime:
+            self._next_read += self._chunk / self._sample_rate
+            time.sleep(max(0, self._next_read - time.monotonic()))
+
+        try:
+            return self._queue.popleft()
+        except IndexError:
+            if not self._realtime:
+                # Nothing queued, do not spin writing silence
+                time.sleep(self._chunk / self._sample_rate)
+            return bytes(2 * self._chunk)
+
+    def close(self):
+        """
+        Method to close the fake device
+        """
+        self._next_read = None
+
+
+class AudioCapture():
+    """
+    Class to keep one input stream open in a background thread.
+    Captured chunks are written into a ring buffer that listeners read from,
+    so no device setup happens between turns.
+    """
+
+    def __init__(self, backend, buffer_seconds=30) -> None:
+        """
+        Default constructor
+        @backend: MicrophoneBackend or FakeBackend
+        @buffer_seconds: audio kept in the ring buffer
+        """
+        # Initialize logger name
+        self._logger = logging.getLogger(self.__class__.__name__)
+        # Set backend
+        self._backend = backend
+        # Initialize ring buffer
+        self._buffer = AudioRingBuffer(int(buffer_seconds * backend.sample_rate))
+        # Capture thread
+        self._thread = None
+        self._stop = threading.Event()
+        # Set on every write to wake up readers
+        self._data_ready = threading.Event()
+        # Error that stopped the capture thread
+        self._error = None
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, backend: {self._backend}, running: {self.running}"
+
+    @property
+    def sample_rate(self):
+        """
+        Return sample_rate
+        """
+        return self._backend.sample_rate
+
+    @property
+    def chunk(self):
+        """
+        Return chunk
+        """
+        return self._backend.chunk
+
+    @property
+    def position(self):
+        """
+        Return position
+        """
+        return self._buffer.written
+
+    @property
+    def running(self):
+        """
+        Return running
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Method to open the backend and start the capture thread
+        """
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._error = None
+        self._backend.open()
+        self._thread = threading.Thread(target=self._capture, name="AudioCapture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Method to stop the capture thread and close the backend
+        """
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._backend.close()
+        self._data_ready.set()
+
+    def _capture(self):
+        """
+        Capture thread loop
+        """
+        self._logger.debug(f"Capturing from {self._backend}")
+        while not self._stop.is_set():
+            try:
+                chunk = self._backend.read()
+            except Exception as e:
+                self._logger.error(f"Unable to read from device: {e}")
+                self._error = e
+                break
+
+            self._buffer.write(np.frombuffer(chunk, dtype='<i2'))
+            self._data_ready.set()
+
+        self._data_ready.set()
+
+    def read(self, position, count):
+        """
+        Method to read count samples from a reader position, waiting for them if needed
+        @Return Tuple (samples, next position)
+        """
+        parts = []
+        while count > 0:
+            samples, position = self._buffer.read(position, count)
+            parts.append(samples)
+            count -= len(samples)
+
+            if count > 0:
+                if not self.running:
+                    raise AudioCaptureStoppedException(f"Capture stopped: {self._error}")
+                self._data_ready.clear()
+                # Writer may have published before clear, so wait at most one chunk
+                self._data_ready.wait(self.chunk / self.sample_rate)
+
+        return np.concatenate(parts), position
+
+    def source(self, pre_roll=0.5):
+        """
+        Method to get an audio source reading from the capture
+        @pre_roll: seconds of audio before entering the source that are read first
+        """
+        return CaptureSource(self, pre_roll)
+
+
+class CaptureSource(sr.AudioSource):
+    """
+    Class to use a persistent capture wherever a SpeechRecognition microphone is used
+    """
+
+    def __init__(self, capture, pre_roll=0.5) -> None:
+        """
+        Default constructor
+        """
+        self._capture = capture
+        self._pre_roll = int(pre_roll * capture.sample_rate)
+        self.SAMPLE_RATE = capture.sample_rate
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = capture.chunk
+        self.stream = None
+
+    def __enter__(self):
+        """
+        Start reading from the last pre roll samples
+        """
+        if not self._capture.running:
+            raise AudioCaptureStoppedException("Capture is not running")
+
+        self.stream = _CaptureStream(self._capture, max(0, self._capture.position - self._pre_roll))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Stop reading
+        """
+        self.stream = None
+
+
+class _CaptureStream():
+    """
+    Class with the stream interface of a SpeechRecognition microphone
+    """
+
+    def __init__(self, capture, position) -> None:
+        """
+        Default constructor
+        """
+        self._capture = capture
+        self._position = position
+
+    def read(self, size):
+        """
+        Method to read size samples as raw 16 bits PCM bytes
+        """
+        samples, self._position = self._capture.read(self._position, size)
+        return samples.astype('<i2', copy=False).tobytes()
@@ -5,13 +5,13 @@ listener_engine.py - File that contains listener class
 
 import logging
 import speech_recognition as sr
-import requests
 from typing import Text, Tuple
-from urllib import parse
 from os import path
 from playsound import playsound
 from archie.utils.decorators import trace_info
 from archie.utils.statistics import SpeechToTextStats
+from archie.lib.engine.voice_activity import VoiceActivityDetector
+from archie.lib.engine.audio_capture import AudioCapture, FakeBackend, MicrophoneBackend
 
 class ListenerRecognizerException(Exception):
     """ Custom exception for recognizer """
@@ -37,9 +37,14 @@ class Listener():
     """
 
     @trace_info("Initializing listener engine ...")
-    def __init__(self, microphone_index, audio_rate, adjust_for_noise, sounds_path, db_path, language="es-es") -> None:
+    def __init__(self, microphone_index, audio_rate, adjust_for_noise, sounds_path, db_path, language="es-es",
+                 streaming=False, vad=False, persistent_stream=False, fake_device=None,
+                 stats_reporter=None) -> None:
         """
         Default constructor
+        @stats_reporter: StatsReporter of recognized requests. Not reported if None.
+        @persistent_stream: keep one microphone stream open in a capture thread between calls
+        @fake_device: wav file played by a fake input device instead of the microphone
         """
         # Initialize logger name
         self._logger = logging.getLogger(self.__class__.__name__)
@@ -64,18 +69,69 @@ class Listener():
         self._db_path = db_path
         # Initialize statics datababase connection
         self._stats = SpeechToTextStats(self._db_path, "statistics.db")
+        # Set stats reporter
+        self._stats_reporter = stats_reporter
+        # Set streaming recognition. Imported on demand, grpc and Google Cloud speech
+        # are only required in streaming mode.
+        self._streaming = None
+        if streaming:
+            from archie.lib.engine.streaming_recognizer import StreamingRecognizer
+            self._streaming = StreamingRecognizer(self._language)
+        # Set voice activity detection. Detector is created with the microphone sample rate.
+        self._use_vad = vad
+        self._vad = None
+        # Set persistent capture
+        self._capture = None
+        if persistent_stream or fake_device:
+            backend = FakeBackend(fake_device) if fake_device else MicrophoneBackend(self._micro_index)
+            self._capture = AudioCapture(backend)
+            self._capture.start()
 
     def __repr__(self) -> str:
         """ Return a printed version """
         return f"{self.__class__.__name__}, language: {self._language}, micro index: {self._micro_index}, audio rate: {self._audio_rate}"
 
-    def listen(self, timeout=None, play_sound=True):
+    def listen(self, timeout=None, play_sound=True, on_interim=None):
         """
         Method to listen. It returns transcription
+        @on_interim: function called with interim hypotheses in streaming mode
         """
+        if self._streaming:
+            return self._listen_streaming(timeout, play_sound, on_interim)
+
         query = ""
+        audio = self.capture(timeout, play_sound)
+
         try:
-            with sr.Microphone(device_index=self._micro_index) as source:
+            self._logger.info("Performing speech to text recognizition ...")
+            #query = self._listener.recognize_google(audio, language=self._language)
+            query = self._listener.recognize_google_cloud(
+                audio, language=self._language)
+            self._logger.debug(f"Someone said {query}")
+
+            self._update_stats(query)
+
+        except sr.RequestError as e:
+            self._logger.error(f"Request error: {e}")
+        except sr.UnknownValueError as e:
+            self._logger.error(f"Unknown value error: {e}")
+        except Exception as e:
+            raise ListenerRecognizerException(
+                f"Recognition error: {e}")
+
+        audio.sample_rate = self._audio_rate
+        return query.strip(), audio
+
+    def capture(self, timeout=None, play_sound=False):
+        """
+        Method to capture an utterance from the microphone without recognizing it
+        @Return AudioData
+        """
+        if self._use_vad:
+            return self._capture_vad(timeout, play_sound)
+
+        try:
+            with self._source() as source:
                 self._logger.info("Listenning ...")
                 if self._adjust_for_noise:
                     # Set sensitivity
@@ -93,49 +149,104 @@ class Listener():
         except Exception as e:
             raise ListenerException(f"Unable to open microphone: {e}")
 
+        return audio
+
+    def _capture_vad(self, timeout, play_sound):
+        """
+        Method to capture an utterance with the voice activity detector.
+        Its noise floor is kept between calls, so there is no per call calibration.
+        @Return AudioData
+        """
         try:
-            self._logger.info("Performing speech to text recognizition ...")
-            #query = self._listener.recognize_google(audio, language=self._language)
-            query = self._listener.recognize_google_cloud(
-                audio, language=self._language)
-            self._logger.debug(f"Someone said {query}")
+            with self._source() as source:
+                self._logger.info("Listenning (vad) ...")
+                if self._vad is None or self._vad.sample_rate != source.SAMPLE_RATE:
+                    self._vad = VoiceActivityDetector(
+                        source.SAMPLE_RATE, hangover_ms=self._listener.pause_threshold * 1000)
+                self._vad.reset()
 
-            # TODO: Make it trow the service interface
-            # Saving stats
-            parameter = parse.quote_plus(query)
-            res = requests.get(f"http://localhost:30153/stats/requests/update/{parameter}")
-            if res.json().get('res') == "0":
-                self._logger.debug("Requests updated succesfully in to the database")
-            res = requests.get(f"http://localhost:30153/stats/requests/getcurrent")
-            
-            response = res.json()
-            if response.get("res") == "0":
-                self._logger.debug(f"Current month requests: {response.get('val')}/240")
-            else:
-                self._logger.error(f"Unable to fetch requests stats from database")
-
-
-            # # Saving stats
-            # self._stats.update(query)
-
-            # # Fetch current month requests
-            # try:
-            #     requests = self._stats.get_current_month_requests()
-            #     self._logger.debug(f"Current month requests: {requests}/240")
-            # except:
-            #     self._logger.error(f"Unable to fetch requests stats from database")
-                
-        except sr.RequestError as e:
-            self._logger.error(f"Request error: {e}")
-        except sr.UnknownValueError as e:
-            self._logger.error(f"Unknown value error: {e}")
+                # Play listenning sound
+                if play_sound:
+                    playsound(path.join(self._sounds_path, 'listenning.mp3'))
+
+                # Listenning until the first end of speech, one utterance per call
+                read = 0
+                segments = []
+                while not segments:
+                    if timeout and not self._vad.in_speech and read > timeout * source.SAMPLE_RATE:
+                        raise ListenerTimeoutException(f"Reached timeout for listener")
+                    segments = self._vad.process(source.stream.read(source.CHUNK), first=True)
+                    read += source.CHUNK
+
+                audio = sr.AudioData(segments[0].tobytes(), source.SAMPLE_RATE, 2)
+                self._logger.info("Someone said something!")
+        except ListenerTimeoutException:
+            raise
         except Exception as e:
-            raise ListenerRecognizerException(
-                f"Recognition error: {e}")
+            raise ListenerException(f"Unable to open microphone: {e}")
+
+        return audio
+
+    def _listen_streaming(self, timeout, play_sound, on_interim):
+        """
+        Method to listen while recognizing. Microphone chunks are streamed to the
+        recognizer as they are captured and listening ends on the end of speech event.
+        """
+        from archie.lib.engine.streaming_recognizer import StreamingRecognizerTimeoutException
+
+        try:
+            with self._source() as source:
+                self._logger.info("Listenning (streaming) ...")
+
+                # Play listenning sound
+                if play_sound:
+                    playsound(path.join(self._sounds_path, 'listenning.mp3'))
+
+                query, frame_data = self._streaming.recognize(
+                    lambda: source.stream.read(source.CHUNK),
+                    source.SAMPLE_RATE, timeout=timeout, on_interim=on_interim)
+
+                audio = sr.AudioData(frame_data, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+        except StreamingRecognizerTimeoutException as e:
+            raise ListenerTimeoutException(f"Reached timeout for listener")
+        except Exception as e:
+            raise ListenerRecognizerException(f"Recognition error: {e}")
+
+        self._logger.debug(f"Someone said {query}")
+
+        if query:
+            self._update_stats(query)
 
         audio.sample_rate = self._audio_rate
         return query.strip(), audio
-  
+
+    def close(self):
+        """
+        Method to stop the persistent capture
+        """
+        if self._capture is not None:
+            self._capture.stop()
+
+    def _source(self):
+        """
+        Method to get the audio source of a turn
+        @Return persistent capture source or a new microphone
+        """
+        if self._capture is not None:
+            return self._capture.source()
+
+        return sr.Microphone(device_index=self._micro_index)
+
+    def _update_stats(self, query):
+        """
+        Method to queue speech to text stats for the monitor service
+        """
+        if self._stats_reporter is None:
+            return
+
+        self._stats_reporter.report(query)
+        self._logger.debug(f"Current month requests: {self._stats_reporter.current_month_requests}/240")
+
 # Troubleshooting
 # The recognizer tries to recognize speech even when I’m not speaking, or after I’m done speaking.
 # Try increasing the recognizer_instance.energy_threshold property. This is basically how sensitive the recognizer is to when recognition should start. Higher values mean that it will be less sensitive, which is useful if you are in a loud room.
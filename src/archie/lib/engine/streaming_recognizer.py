@@ -0,0 +1,116 @@
+# encoding:utf-8
+"""
+streaming_recognizer.py - File that contains streaming speech to text recognizer class
+"""
+
+import grpc
+import logging
+import time
+from google.cloud import speech
+from google.cloud.speech_v1.services.speech.transports import SpeechGrpcTransport
+
+
+class StreamingRecognizerTimeoutException(Exception):
+    """ Custom exception for no speech detected before timeout """
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}"
+
+
+class StreamingRecognizer():
+    """
+    Class to recognize speech while it is captured.
+    Audio chunks are pushed to Google Cloud streaming recognition as they are read
+    from the microphone, interim hypotheses are surfaced as they arrive and the
+    utterance ends on the recognizer's end of speech event.
+    """
+
+    def __init__(self, language="es-es", api_endpoint=None) -> None:
+        """
+        Default constructor
+        @api_endpoint: host:port of a local stand-in speech service, reached
+        through an insecure channel. Google Cloud if None.
+        """
+        # Initialize logger name
+        self._logger = logging.getLogger(self.__class__.__name__)
+        # Set language
+        self._language = language
+        # Set speech service endpoint
+        self._api_endpoint = api_endpoint
+        # Initialize client lazily, credentials are set after listener initialization
+        self._client = None
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, language: {self._language}, endpoint: {self._api_endpoint}"
+
+    def _get_client(self):
+        """
+        Method to get speech client
+        """
+        if self._client is None:
+            if self._api_endpoint:
+                self._client = speech.SpeechClient(transport=SpeechGrpcTransport(
+                    channel=grpc.insecure_channel(self._api_endpoint)))
+            else:
+                self._client = speech.SpeechClient()
+
+        return self._client
+
+    def recognize(self, read_chunk, sample_rate, timeout=None, on_interim=None):
+        """
+        Method to recognize an utterance while it is captured
+        @read_chunk: function returning next raw PCM 16 bits chunk
+        @sample_rate: audio sample rate
+        @timeout: max seconds to wait for speech to start. Wait forever if None.
+        @on_interim: function called with every interim hypothesis
+        @Return Tuple (transcription, captured raw audio)
+        """
+        # Captured chunks, sent to the recognizer and kept for speaker recognition
+        frames = []
+        state = {"speech": False, "end": False}
+        start = time.monotonic()
+
+        def requests():
+            """ Generator of audio requests until end of speech """
+            while not state["end"]:
+                if timeout and not state["speech"] and time.monotonic() - start > timeout:
+                    return
+                chunk = read_chunk()
+                frames.append(chunk)
+                yield speech.StreamingRecognizeRequest(audio_content=chunk)
+
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=sample_rate,
+            language_code=self._language)
+        streaming_config = speech.StreamingRecognitionConfig(
+            config=config, interim_results=True, single_utterance=True)
+
+        responses = self._get_client().streaming_recognize(streaming_config, requests())
+
+        transcription = ""
+        for response in responses:
+            if response.speech_event_type == \
+                    speech.StreamingRecognizeResponse.SpeechEventType.END_OF_SINGLE_UTTERANCE:
+                # Stop capturing, remaining responses carry the final result
+                state["end"] = True
+
+            for result in response.results:
+                if not result.alternatives:
+                    continue
+                state["speech"] = True
+                hypothesis = result.alternatives[0].transcript
+                if result.is_final:
+                    transcription += hypothesis
+                else:
+                    self._logger.debug(f"Interim hypothesis: {hypothesis}")
+                    if on_interim:
+                        on_interim(hypothesis)
+
+        state["end"] = True
+
+        if timeout and not state["speech"]:
+            raise StreamingRecognizerTimeoutException("No speech detected")
+
+        return transcription, b"".join(frames)
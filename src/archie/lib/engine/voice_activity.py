@@ -0,0 +1,232 @@
+# encoding:utf-8
+"""
+voice_activity.py - File that contains voice activity detector class
+"""
+
+import logging
+from collections import deque
+import numpy as np
+
+
+class VoiceActivityDetector():
+    """
+    Class to split a stream of 16 bits PCM audio into speech segments.
+    A frame is speech when its energy is over a continuously updated noise floor
+    and most of its energy lies in the voice band. A pre-roll ring buffer keeps
+    the frames before the onset, so the beginning of words is never clipped.
+    """
+
+    # Voice band in Hz
+    _VOICE_BAND = (80, 4000)
+    # Noise floor adaptation rates when energy goes down, goes up or during speech
+    _FLOOR_DOWN = 0.5
+    _FLOOR_UP = 0.05
+    _FLOOR_SPEECH = 0.001
+    # Energy of an empty frame in dB
+    _MIN_DB = -100.0
+
+    def __init__(self, sample_rate, frame_ms=30, pre_roll_ms=300, onset_ms=90,
+                 hangover_ms=800, min_speech_ms=250, max_speech_s=30,
+                 margin_db=10.0, voice_ratio=0.6) -> None:
+        """
+        Default constructor
+        @frame_ms: analysis frame length
+        @pre_roll_ms: audio kept before the onset of a segment
+        @onset_ms: speech needed to start a segment
+        @hangover_ms: silence needed to end a segment
+        @min_speech_ms: shorter segments are discarded as clicks
+        @max_speech_s: longer segments are cut
+        @margin_db: min energy over the noise floor of a speech frame
+        @voice_ratio: min fraction of frame energy in the voice band of a speech frame
+        """
+        # Initialize logger name
+        self._logger = logging.getLogger(self.__class__.__name__)
+        # Set sample rate
+        self._sample_rate = sample_rate
+        # Set frame length in samples
+        self._frame_length = int(sample_rate * frame_ms / 1000)
+        # Set durations in frames
+        self._onset_frames = max(1, round(onset_ms / frame_ms))
+        self._hangover_frames = max(1, round(hangover_ms / frame_ms))
+        self._min_speech_frames = round(min_speech_ms / frame_ms)
+        self._max_speech_frames = round(max_speech_s * 1000 / frame_ms)
+        # Set decision thresholds
+        self._margin_db = margin_db
+        self._voice_ratio = voice_ratio
+        # Voice band bins of the frame spectrum
+        frequencies = np.fft.rfftfreq(self._frame_length, 1 / sample_rate)
+        self._voice_bins = (frequencies >= self._VOICE_BAND[0]) & (frequencies <= self._VOICE_BAND[1])
+        # Pre-roll ring buffer of frames
+        self._pre_roll = deque(maxlen=max(self._onset_frames, round(pre_roll_ms / frame_ms)))
+        # Noise floor in dB, set by the first frame
+        self._noise_floor = None
+        # Bounds in samples of the last emitted segment
+        self._last_bounds = None
+
+        self.reset()
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, sample rate: {self._sample_rate}, noise floor: {self._noise_floor}"
+
+    @property
+    def sample_rate(self):
+        """
+        Return sample_rate
+        """
+        return self._sample_rate
+
+    @property
+    def noise_floor(self):
+        """
+        Return noise_floor
+        """
+        return self._noise_floor
+
+    @property
+    def in_speech(self):
+        """
+        Return in_speech
+        """
+        return self._speech is not None
+
+    @property
+    def last_bounds(self):
+        """
+        Return last_bounds
+        """
+        return self._last_bounds
+
+    def reset(self):
+        """
+        Method to drop buffered audio and the current segment.
+        The noise floor is kept, so no calibration is needed on the next stream.
+        """
+        # Samples not yet forming a full frame
+        self._pending = np.empty(0, dtype=np.int16)
+        self._pre_roll.clear()
+        # Frames of the current segment, None while in silence
+        self._speech = None
+        # Consecutive speech and silence frames
+        self._voiced = 0
+        self._silent = 0
+        # Samples processed, used to locate segments
+        self._position = 0
+
+    def _classify(self, frames):
+        """
+        Method to get energy in dB and voice band energy ratio of every frame
+        """
+        samples = frames.astype(np.float64)
+        energy = np.maximum(10 * np.log10(np.mean(samples ** 2, axis=1) + 1e-10), self._MIN_DB)
+
+        power = np.abs(np.fft.rfft(samples, axis=1)) ** 2
+        ratio = power[:, self._voice_bins].sum(axis=1) / (power.sum(axis=1) + 1e-10)
+
+        return energy, ratio
+
+    def _update_floor(self, energy, speech):
+        """
+        Method to track the noise floor, falling fast and rising slowly
+        """
+        if self._noise_floor is None:
+            self._noise_floor = energy
+        elif speech:
+            self._noise_floor += self._FLOOR_SPEECH * (energy - self._noise_floor)
+        elif energy < self._noise_floor:
+            self._noise_floor += self._FLOOR_DOWN * (energy - self._noise_floor)
+        else:
+            self._noise_floor += self._FLOOR_UP * (energy - self._noise_floor)
+
+    def _end_segment(self):
+        """
+        Method to close the current segment
+        @Return segment samples or None if too short
+        """
+        # Trailing silence is dropped except for the onset length
+        frames = self._speech[:len(self._speech) - max(0, self._silent - self._onset_frames)]
+        self._speech = None
+        self._voiced = 0
+        self._silent = 0
+
+        if len(frames) < self._min_speech_frames:
+            self._logger.debug("Segment discarded, too short")
+            return None
+
+        segment = np.concatenate(frames)
+        start = self._segment_start
+        self._last_bounds = (start, start + len(segment))
+        self._logger.debug(
+            f"Speech segment from {start / self._sample_rate:.2f}s to "
+            f"{(start + len(segment)) / self._sample_rate:.2f}s")
+
+        return segment
+
+    def process(self, data, first=False):
+        """
+        Method to feed audio
+        @data: raw 16 bits PCM bytes or a NumPy array of any length
+        @first: return on the first completed segment, audio after it is kept for the next call
+        @Return list of speech segments completed by data
+        """
+        audio = data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype='<i2')
+        audio = np.concatenate((self._pending, audio.astype(np.int16, copy=False)))
+
+        count = len(audio) // self._frame_length
+        self._pending = audio[count * self._frame_length:]
+        if not count:
+            return []
+
+        frames = audio[:count * self._frame_length].reshape(count, self._frame_length)
+        energies, ratios = self._classify(frames)
+
+        segments = []
+        for index, (frame, energy, ratio) in enumerate(zip(frames, energies, ratios)):
+            speech = self._noise_floor is not None and \
+                energy > self._noise_floor + self._margin_db and ratio >= self._voice_ratio
+            self._update_floor(energy, self._speech is not None or speech)
+            self._position += self._frame_length
+
+            if self._speech is None:
+                self._pre_roll.append(frame)
+                self._voiced = self._voiced + 1 if speech else 0
+                if self._voiced >= self._onset_frames:
+                    # Onset, the segment starts with the pre-roll
+                    self._speech = list(self._pre_roll)
+                    self._segment_start = self._position - len(self._speech) * self._frame_length
+                    self._pre_roll.clear()
+                    self._silent = 0
+            else:
+                self._speech.append(frame)
+                self._silent = 0 if speech else self._silent + 1
+                if self._silent >= self._hangover_frames or len(self._speech) >= self._max_speech_frames:
+                    segment = self._end_segment()
+                    if segment is not None:
+                        segments.append(segment)
+                        if first:
+                            self._pending = audio[(index + 1) * self._frame_length:]
+                            break
+
+        return segments
+
+    def flush(self):
+        """
+        Method to close the current segment at the end of the stream
+        @Return segment samples or None
+        """
+        segment = self._end_segment() if self._speech is not None else None
+        self._pending = np.empty(0, dtype=np.int16)
+        self._pre_roll.clear()
+
+        return segment
+
+    def segments(self, chunks):
+        """
+        Generator that yields speech segments of an iterable of audio chunks
+        """
+        for chunk in chunks:
+            yield from self.process(chunk)
+
+        segment = self.flush()
+        if segment is not None:
+            yield segment
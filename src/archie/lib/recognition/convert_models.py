@@ -0,0 +1,80 @@
+# encoding:utf-8
+"""
+convert_models.py - File that contains code to convert legacy per speaker .gmm
+pickles into a single model bank file
+"""
+
+import argparse
+import logging
+from os import path
+from archie.lib.recognition.model_bank import ModelBank
+
+__authors__ = "Marco Espinosa"
+__license__ = "MIT License"
+__version__ = "1.0"
+__maintainer__ = "Marco Espinosa"
+__email__ = "hi@marcoespinosa.es"
+__status__ = "Development"
+
+# Setting application logging level
+LOG_LEVEL = "DEBUG"
+
+
+def configure_logger():
+    """
+    Method to configure logging
+    """
+    logargs = {
+        'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        'datefmt': '%Y-%m-%d %H:%M:%S'}
+
+    logargs["level"] = LOG_LEVEL
+
+    logging.basicConfig(**logargs)
+
+    return logging.getLogger("Convert models util")
+
+
+def convert_models(models_path, bank_file=None):
+    """
+    Function to convert .gmm pickles in models_path into a model bank file.
+    Speakers already in the bank file are replaced by the converted ones.
+    @Return ModelBank
+    """
+    if bank_file is None:
+        bank_file = path.join(models_path, ModelBank.FILE_NAME)
+
+    bank = ModelBank.from_gmm_files(models_path)
+
+    if path.exists(bank_file):
+        bank = ModelBank.load(bank_file).merge(bank)
+
+    bank.save(bank_file)
+
+    return bank
+
+
+def main():
+    """ Main fucntion """
+
+    # Configure logger
+    logger = configure_logger()
+
+    # Configure arguments
+    parser = argparse.ArgumentParser(description="Convert .gmm models into a model bank file")
+    parser.add_argument('models_path',
+                        help="Path where .gmm models are stored.")
+    parser.add_argument('-o', '--output',
+                        help=f"Model bank file. Defaults to {ModelBank.FILE_NAME} inside models path.")
+
+    args = parser.parse_args()
+
+    logger.info(f"Converting models in {args.models_path} ...")
+    bank = convert_models(args.models_path, args.output)
+    for speaker in bank.speakers:
+        logger.info(f"{speaker} converted")
+    logger.info("ok")
+
+
+if __name__ == "__main__":
+    main()
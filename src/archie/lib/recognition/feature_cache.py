@@ -0,0 +1,172 @@
+# encoding:utf-8
+"""
+feature_cache.py - File that contains a content-addressed on-disk cache of
+speech features
+"""
+
+import hashlib
+import json
+import logging
+import os
+import numpy as np
+
+__authors__ = "Marco Espinosa"
+__license__ = "MIT License"
+__version__ = "1.0"
+__maintainer__ = "Marco Espinosa"
+__email__ = "hi@marcoespinosa.es"
+__status__ = "Development"
+
+
+class FeatureCache():
+    """
+    Class to cache extracted features as float32 .npy blocks.
+    Entries are keyed by the hash of the audio file contents and the feature
+    extraction parameters, so changed samples or parameters never hit stale entries.
+    Least recently used entries are evicted when the cache exceeds max_size bytes.
+    The folder is scanned each time a process wrote a share of max_size since
+    its last scan, so concurrent training processes overshoot max_size by one
+    share each at most, and no put lists the whole folder.
+    """
+
+    # Read block size to hash files
+    _BLOCK_SIZE = 1 << 20
+    # Share of max size written by one process between scans of the cache folder
+    _SCAN_RATIO = 0.01
+    # Share of max size left after eviction
+    _EVICT_RATIO = 0.9
+
+    def __init__(self, cache_path, max_size=512 * 1024 * 1024) -> None:
+        """
+        Default constructor
+        @cache_path: folder where entries are stored
+        @max_size: max cache size in bytes
+        """
+        # Initialize logger name
+        self._logger = logging.getLogger("Feature Cache")
+        # Set cache path
+        self._cache_path = cache_path
+        # Set max cache size
+        self._max_size = max_size
+
+        os.makedirs(self._cache_path, exist_ok=True)
+
+        # Bytes written by this process since the last scan
+        self._unscanned = 0
+        self._evict()
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, cache path: {self._cache_path}, max size: {self._max_size}"
+
+    def key(self, audio_file, parameters):
+        """
+        Method to build the cache key of an audio file and feature parameters
+        """
+        digest = hashlib.sha256()
+
+        with open(audio_file, "rb") as audio:
+            for block in iter(lambda: audio.read(self._BLOCK_SIZE), b""):
+                digest.update(block)
+
+        digest.update(json.dumps(parameters, sort_keys=True).encode())
+
+        return digest.hexdigest()
+
+    def _entry(self, key):
+        """
+        Method to get the entry file of a key
+        """
+        return os.path.join(self._cache_path, key + ".npy")
+
+    def get(self, key):
+        """
+        Method to get a memory-mapped feature block
+        @Return array or None when not cached
+        """
+        entry = self._entry(key)
+
+        try:
+            features = np.load(entry, mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # Refresh access time for LRU eviction
+        os.utime(entry)
+
+        return features
+
+    def put(self, key, features):
+        """
+        Method to store a feature block as float32
+        @Return stored block, same dtype as cached blocks
+        """
+        entry = self._entry(key)
+        features = np.asarray(features, dtype=np.float32)
+
+        # Write aside and move, so concurrent readers never see a partial entry
+        temp_entry = f"{entry}.{os.getpid()}.tmp"
+        with open(temp_entry, "wb") as dump:
+            np.save(dump, features)
+        size = os.path.getsize(temp_entry)
+        try:
+            # Replaced entry is not counted twice
+            size -= os.path.getsize(entry)
+        except FileNotFoundError:
+            pass
+        os.replace(temp_entry, entry)
+
+        self._unscanned += size
+        if self._unscanned > self._max_size * self._SCAN_RATIO:
+            self._evict()
+
+        return features
+
+    def features(self, audio_file, parameters, extract):
+        """
+        Method to get features of an audio file, extracting and caching them on a miss
+        @extract: function returning the features of audio_file
+        """
+        key = self.key(audio_file, parameters)
+        features = self.get(key)
+
+        if features is None:
+            self._logger.debug(f"Cache miss for {audio_file}")
+            features = self.put(key, extract(audio_file))
+
+        return features
+
+    def _entries(self):
+        """
+        Method to list cache entries
+        @Return list of access time, size and path of every entry
+        """
+        entries = []
+        for entry in os.scandir(self._cache_path):
+            if entry.name.endswith(".npy"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        return entries
+
+    def _evict(self):
+        """
+        Method to remove least recently used entries until cache is under evict ratio of max size,
+        if the cache exceeds max size. Entries are listed, so entries added by other processes count.
+        """
+        entries = self._entries()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        self._unscanned = 0
+        if size <= self._max_size:
+            return
+
+        for _, entry_size, entry in sorted(entries):
+            if size <= self._max_size * self._EVICT_RATIO:
+                break
+            try:
+                os.remove(entry)
+                self._logger.debug(f"Evicted {entry}")
+            except FileNotFoundError:
+                # Already evicted by another process
+                pass
+            size -= entry_size
@@ -0,0 +1,323 @@
+# encoding:utf-8
+"""
+model_bank.py - File that contains the speaker model bank used to score
+every enrolled speaker at once
+"""
+
+import os
+import _pickle as cPickle
+import numpy as np
+
+__authors__ = "Marco Espinosa"
+__license__ = "MIT License"
+__version__ = "1.0"
+__maintainer__ = "Marco Espinosa"
+__email__ = "hi@marcoespinosa.es"
+__status__ = "Development"
+
+
+class ModelBankEmptyException(Exception):
+    """ Custom exception for a model bank without speakers """
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}"
+
+
+class ModelBankVersionException(Exception):
+    """ Custom exception for a model bank file with an unsupported version """
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}"
+
+
+class ModelBank():
+    """
+    Class that stacks diagonal covariance GMMs of all speakers into
+    arrays of means, precisions and log-weights.
+    Speakers with less components are padded with zero weight components.
+    """
+
+    # Model bank file format version
+    VERSION = 1
+
+    # Default model bank file name inside models path
+    FILE_NAME = "speakers.bank.npy"
+
+    # Universal background model bank file name inside models path
+    UBM_FILE_NAME = "ubm.bank.npy"
+
+    def __init__(self, speakers, log_weights, means, precisions) -> None:
+        """
+        Default constructor
+        @speakers: list of speaker names
+        @log_weights: (speakers, components) array, -inf for padded components
+        @means: (speakers, components, features) array
+        @precisions: (speakers, components, features) array (inverse of diagonal covariances)
+        """
+        self._speakers = list(speakers)
+        self._log_weights = log_weights
+        self._means = means
+        self._precisions = precisions
+
+        self._prepare()
+
+    @classmethod
+    def from_components(cls, speakers, weights, means, precisions):
+        """
+        Constructor to build the bank from per speaker parameters
+        @weights: list of (components) arrays
+        @means: list of (components, features) arrays
+        @precisions: list of (components, features) arrays
+        """
+        num_speakers = len(speakers)
+        num_components = max((len(w) for w in weights), default=0)
+        num_features = means[0].shape[1] if num_speakers else 0
+
+        # Padded components have -inf log-weight so they never contribute
+        log_weights = np.full((num_speakers, num_components), -np.inf)
+        stacked_means = np.zeros((num_speakers, num_components, num_features))
+        stacked_precisions = np.ones((num_speakers, num_components, num_features))
+
+        for i in range(num_speakers):
+            k = len(weights[i])
+            log_weights[i, :k] = np.log(weights[i])
+            stacked_means[i, :k] = means[i]
+            stacked_precisions[i, :k] = precisions[i]
+
+        return cls(speakers, log_weights, stacked_means, stacked_precisions)
+
+    @classmethod
+    def from_gmms(cls, models):
+        """
+        Constructor to build the bank from a list of (GaussianMixture, speaker name) tuples
+        """
+        return cls.from_components([speaker for _, speaker in models],
+                                   [gmm.weights_ for gmm, _ in models],
+                                   [gmm.means_ for gmm, _ in models],
+                                   [gmm.precisions_ for gmm, _ in models])
+
+    @staticmethod
+    def speaker_name(name):
+        """
+        Method to get the speaker of a samples folder or model file name.
+        Suffixes after a dash are dropped, so marco-1 samples are marco.
+        """
+        return name.split('-')[0]
+
+    @classmethod
+    def load_gmm_file(cls, gmm_file):
+        """
+        Method to load a legacy .gmm pickle file
+        @Return Tuple (GaussianMixture, speaker name)
+        """
+        with open(gmm_file, 'rb') as model:
+            gmm = cPickle.load(model)
+
+        return gmm, cls.speaker_name(os.path.basename(gmm_file).split(".gmm")[0])
+
+    @classmethod
+    def from_gmm_files(cls, models_path):
+        """
+        Constructor to build the bank from legacy per speaker .gmm pickle files
+        """
+        return cls.from_gmms([cls.load_gmm_file(os.path.join(models_path, fname))
+                              for fname in sorted(os.listdir(models_path))
+                              if fname.endswith('.gmm')])
+
+    @classmethod
+    def load(cls, bank_file):
+        """
+        Constructor to load a model bank file. Arrays are memory-mapped.
+        """
+        records = np.load(bank_file, mmap_mode='r')
+
+        if records.dtype.names is None or "version" not in records.dtype.names:
+            raise ModelBankVersionException(f"{bank_file} is not a model bank file")
+
+        if len(records) and int(records["version"][0]) != cls.VERSION:
+            raise ModelBankVersionException(
+                f"Unsupported model bank version {records['version'][0]} in {bank_file}")
+
+        return cls([str(speaker) for speaker in records["speaker"]],
+                   records["log_weights"], records["means"], records["precisions"])
+
+    def save(self, bank_file):
+        """
+        Method to save the bank into a single model bank file.
+        The file is written aside and then moved, so readers never see a partial file.
+        """
+        num_speakers, num_components, num_features = self._means.shape
+        # Speaker field fits the longest name, so no name is truncated
+        speaker_length = max((len(speaker) for speaker in self._speakers), default=1)
+
+        records = np.zeros(num_speakers, dtype=[
+            ("version", "<u2"),
+            ("speaker", f"<U{speaker_length}"),
+            ("log_weights", "<f8", (num_components,)),
+            ("means", "<f8", (num_components, num_features)),
+            ("precisions", "<f8", (num_components, num_features))])
+
+        records["version"] = self.VERSION
+        records["speaker"] = self._speakers
+        records["log_weights"] = self._log_weights
+        records["means"] = self._means
+        records["precisions"] = self._precisions
+
+        temp_file = f"{bank_file}.tmp"
+        with open(temp_file, "wb") as dump:
+            np.save(dump, records)
+        os.replace(temp_file, bank_file)
+
+    def speaker_components(self, speaker):
+        """
+        Method to get the unpadded parameters of a speaker
+        @Return Tuple (weights, means, precisions)
+        """
+        i = self._speakers.index(speaker)
+        used = np.isfinite(self._log_weights[i])
+
+        return (np.exp(self._log_weights[i][used]),
+                np.asarray(self._means[i][used]), np.asarray(self._precisions[i][used]))
+
+    def merge(self, other):
+        """
+        Method to build a new bank with the speakers of both banks.
+        Speakers in other bank replace speakers with the same name.
+        """
+        speakers = [speaker for speaker in self._speakers if speaker not in other.speakers]
+        components = [self.speaker_components(speaker) for speaker in speakers]
+        components += [other.speaker_components(speaker) for speaker in other.speakers]
+        speakers += other.speakers
+
+        return ModelBank.from_components(speakers,
+                                         [c[0] for c in components],
+                                         [c[1] for c in components],
+                                         [c[2] for c in components])
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, speakers: {len(self._speakers)}"
+
+    def __len__(self) -> int:
+        """ Return number of speakers """
+        return len(self._speakers)
+
+    @property
+    def speakers(self):
+        """
+        Return speakers
+        """
+        return self._speakers
+
+    @property
+    def log_weights(self):
+        """
+        Return log_weights
+        """
+        return self._log_weights
+
+    @property
+    def means(self):
+        """
+        Return means
+        """
+        return self._means
+
+    @property
+    def precisions(self):
+        """
+        Return precisions
+        """
+        return self._precisions
+
+    def _prepare(self):
+        """
+        Method to precompute flattened terms of the gaussian log density:
+        log N(x) = const - 0.5 * x^2 . prec + x . (mean * prec)
+        """
+        # Nothing to precompute, scoring raises ModelBankEmptyException
+        if not self._speakers:
+            self._flat_terms = None
+            self._flat_constants = None
+            return
+
+        num_speakers, num_components, num_features = self._means.shape
+
+        precisions = self._precisions.reshape(-1, num_features)
+        means = self._means.reshape(-1, num_features)
+
+        # Quadratic and linear terms stacked to score with a single product
+        self._flat_terms = np.vstack((-0.5 * precisions.T, (means * precisions).T))
+        self._flat_constants = (self._log_weights.reshape(-1)
+                                - 0.5 * (num_features * np.log(2 * np.pi)
+                                         + np.sum(means ** 2 * precisions, axis=1)
+                                         - np.sum(np.log(precisions), axis=1)))
+
+    def component_log_prob(self, features):
+        """
+        Method to compute the weighted log-density of every frame under every
+        component of every speaker
+        @features: (frames, features) matrix
+        @Return array of (frames, speakers, components) log-densities
+        """
+        if not self._speakers:
+            raise ModelBankEmptyException("There are no speaker models loaded")
+
+        num_speakers, num_components, _ = self._means.shape
+
+        log_prob = np.hstack((features ** 2, features)) @ self._flat_terms
+        log_prob += self._flat_constants
+
+        return log_prob.reshape(-1, num_speakers, num_components)
+
+    def score(self, features):
+        """
+        Method to compute the average log-likelihood of features for every speaker
+        in one vectorized pass
+        @features: (frames, features) matrix
+        @Return array of (speakers) scores
+        """
+        log_prob = self.component_log_prob(features)
+
+        # Log-sum-exp over components
+        max_log_prob = log_prob.max(axis=2, keepdims=True)
+        log_prob -= max_log_prob
+        np.exp(log_prob, out=log_prob)
+        frame_scores = np.log(log_prob.sum(axis=2)) + max_log_prob[..., 0]
+
+        return frame_scores.mean(axis=0)
+
+    def adapt(self, features, relevance_factor=16.0):
+        """
+        Method to derive a speaker model by MAP adaptation of the means of the
+        background model (first model of the bank) in a single pass.
+        Weights and precisions are kept.
+        @features: (frames, features) matrix of the speaker
+        @relevance_factor: how much data is needed to move a mean away from the background model
+        @Return Tuple (weights, means, precisions)
+        """
+        weights, means, precisions = self.speaker_components(self._speakers[0])
+
+        # Responsibilities of each component for each frame
+        log_prob = self.component_log_prob(features)[:, 0, :len(weights)]
+        log_prob -= log_prob.max(axis=1, keepdims=True)
+        responsibilities = np.exp(log_prob)
+        responsibilities /= responsibilities.sum(axis=1, keepdims=True)
+
+        # Sufficient statistics
+        counts = responsibilities.sum(axis=0)
+        expected_means = (responsibilities.T @ features) / np.maximum(counts, np.finfo(float).eps)[:, None]
+
+        # Data-dependent adaptation coefficients
+        alpha = (counts / (counts + relevance_factor))[:, None]
+
+        return weights, alpha * expected_means + (1 - alpha) * means, precisions
+
+    def best_speaker(self, features):
+        """
+        Method to get the speaker with the highest score
+        @Return Tuple (speaker name, scores)
+        """
+        scores = self.score(features)
+
+        return self._speakers[int(np.argmax(scores))], scores
@@ -28,58 +28,73 @@ class SpeakerFeatures():
     20 dim delta computation on MFCC features. 
     """
 
-    def __init__(self, audio, rate) -> None:
+    # Default feature extraction parameters:
+    # window length and step in seconds, number of cepstrums, fft size
+    # and number of frames at each side used to compute deltas
+    DEFAULT_PARAMETERS = {"winlen": 0.025, "winstep": 0.01,
+                          "numcep": 20, "nfft": 512, "delta_n": 2}
+
+    def __init__(self, audio, rate, **parameters) -> None:
         """
         Default constructor
+        @parameters: values overriding DEFAULT_PARAMETERS
         """
         # Set audio variable
         self._audio = audio
         # Set rate variable
         self._rate = rate
+        # Set feature extraction parameters
+        self._parameters = {**self.DEFAULT_PARAMETERS, **parameters}
         # Initialize logger
         self._logger = logging.getLogger("Speaker Features")
 
     def __repr__(self) -> str:
         """ Return a printed version """
-        return f"{self.__class__.__name__}, rate: {self._rate}"
+        return f"{self.__class__.__name__}, rate: {self._rate}, parameters: {self._parameters}"
 
-    def _calculate_delta(self, array):
+    @property
+    def parameters(self):
         """
-        Calculate and returns the delta of given feature vector matrix
+        Return parameters
         """
+        return self._parameters
 
-        rows, cols = array.shape
-        deltas = np.zeros((rows, 20))
-        N = 2
-        for i in range(rows):
-            index = []
-            j = 1
-            while j <= N:
-                if i-j < 0:
-                    first = 0
-                else:
-                    first = i-j
-                if i+j > rows - 1:
-                    second = rows - 1
-                else:
-                    second = i+j
-                index.append((second, first))
-                j += 1
-            deltas[i] = (array[index[0][0]]-array[index[0][1]] +
-                         (2 * (array[index[1][0]]-array[index[1][1]]))) / 10
-        return deltas
-
-    def extract_features(self):
+    def _calculate_delta(self, array, N=2):
+        """
+        Calculate and returns the delta of given feature vector matrix.
+        Frames out of bounds are replaced by the first or last frame (edge padding),
+        so every frame is computed at once with array slicing.
+        """
+        rows = array.shape[0]
+        padded = np.pad(array, ((N, N), (0, 0)), mode='edge')
+        deltas = np.zeros(array.shape)
+
+        for n in range(1, N + 1):
+            deltas += n * (padded[N + n:N + n + rows] - padded[N - n:N - n + rows])
+
+        return deltas / (2 * sum(n * n for n in range(1, N + 1)))
+
+    def extract_features(self, delta_delta=False):
         """
         Extract 20 dim mfcc features from an audio, performs CMS and combines 
-        delta to make it 40 dim feature vector
+        delta to make it 40 dim feature vector.
+        If delta_delta is set, 20 dim delta-delta are appended (60 dim feature vector).
         """
 
+        delta_n = self._parameters["delta_n"]
+
         mfcc_feat = mfcc.mfcc(self._audio, self._rate,
-                              0.025, 0.01, 20, nfft=512, appendEnergy=True)
+                              self._parameters["winlen"], self._parameters["winstep"],
+                              self._parameters["numcep"], nfft=self._parameters["nfft"],
+                              appendEnergy=True)
 
         mfcc_feat = preprocessing.scale(mfcc_feat)
-        delta = self._calculate_delta(mfcc_feat)
+        delta = self._calculate_delta(mfcc_feat, delta_n)
+
+        if delta_delta:
+            # Delta-delta is the delta of the delta features
+            return np.hstack((mfcc_feat, delta, self._calculate_delta(delta, delta_n)))
+
         combined = np.hstack((mfcc_feat, delta))
 
         return combined
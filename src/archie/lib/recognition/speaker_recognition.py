@@ -5,11 +5,12 @@ speaker_recognition.py - File that contains class with speaker recognition metho
 
 import logging
 import os
-import _pickle as cPickle
+import threading
 import numpy as np
 import warnings
 from scipy.io.wavfile import read
 from archie.lib.recognition.speaker_features import SpeakerFeatures
+from archie.lib.recognition.model_bank import ModelBank
 from archie.utils.decorators import trace_info
 
 warnings.filterwarnings("ignore")
@@ -24,25 +25,51 @@ __credits__ = ["Abhijeet Kumar",
                "Speaker-identification-using-GMMs", "abhijeet.kumar@fmr.com"]
 
 
+class SpeakerRecognitionSampleWidthException(Exception):
+    """ Custom exception for unsupported raw audio sample width """
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}"
+
+
+class SpeakerRecognitionUnknownSpeakerException(Exception):
+    """ Custom exception for a speaker rejected by the background model """
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}"
+
+
 class SpeakerRecognition():
     """
     Class to recognize speakers
     """
 
-    # List to store trained models. Tuple of (model, speaker name)
-    _models = []
+    # NumPy types of raw PCM samples by sample width in bytes
+    _PCM_TYPES = {1: np.int8, 2: np.dtype('<i2'), 4: np.dtype('<i4')}
 
     @trace_info("Initializing speaker recognition ...")
-    def __init__(self, model_path) -> None:
+    def __init__(self, model_path, llr_threshold=0.0, watch_interval=0) -> None:
         """
         Default constructor
+        @llr_threshold: min log-likelihood ratio against the universal background
+        model to accept a speaker. Only used when a background model is found.
+        @watch_interval: seconds between checks for changed models. Disabled if 0.
         """
         # Initialize logger name
         self._logger = logging.getLogger(self.__class__.__name__)
-        # Set model path variable
+        # Set model path variable
         self._model_path = model_path
+        # Set log-likelihood ratio threshold
+        self._llr_threshold = llr_threshold
+        # Models are an immutable (bank, background model) tuple replaced on reload
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
         # Load models in initialization
         self._load_models()
+        # Watch models path for retrained models
+        if watch_interval:
+            self.start_watching(watch_interval)
 
     def __repr__(self) -> str:
         """ Return a printed version """
@@ -55,44 +82,168 @@ class SpeakerRecognition():
         # Read the test directory and get the list of test audio files
         sr, audio = read(audio_file)
         self._logger.debug(f"Checking speaker in {audio_file} with rate {sr}")
-        sf = SpeakerFeatures(audio, sr)
+
+        return self._identify(audio, sr)
+
+    def find_speaker_from_buffer(self, data, sample_rate, sample_width=2):
+        """
+        Method to find best speaker recognition from an in-memory audio
+        @data: raw little-endian PCM bytes (such as AudioData.frame_data) or a NumPy array
+        @sample_rate: audio sample rate
+        @sample_width: bytes per sample of raw PCM data
+        """
+        if isinstance(data, np.ndarray):
+            audio = data
+        else:
+            if sample_width not in self._PCM_TYPES:
+                raise SpeakerRecognitionSampleWidthException(
+                    f"Unsupported sample width: {sample_width}")
+            # Zero-copy view over the raw buffer
+            audio = np.frombuffer(data, dtype=self._PCM_TYPES[sample_width])
+
+        self._logger.debug(
+            f"Checking speaker in buffer of {audio.shape[0]} samples with rate {sample_rate}")
+
+        return self._identify(audio, sample_rate)
+
+    def _identify(self, audio, rate):
+        """
+        Method to score an audio against loaded models
+        """
+        sf = SpeakerFeatures(audio, rate)
         vector = sf.extract_features()
 
-        log_likelihood = np.zeros(len(self._models))
+        # Take a reference to current models, they may be swapped by a reload
+        bank, ubm = self._models
 
-        for i in range(len(self._models)):
-            gmm, _ = self._models[i]
-            scores = np.array(gmm.score(vector))
-            log_likelihood[i] = scores.sum()
+        # Score all speakers at once
+        speaker, scores = bank.best_speaker(vector)
 
-        winner = np.argmax(log_likelihood)
-        _, speaker = self._models[winner]
+        # Normalize with the background model to reject unknown speakers
+        if ubm is not None:
+            llr = scores.max() - ubm.score(vector)[0]
+            self._logger.debug(f"Best speaker {speaker} with log-likelihood ratio {llr:.3f}")
+            if llr < self._llr_threshold:
+                raise SpeakerRecognitionUnknownSpeakerException(
+                    f"Log-likelihood ratio {llr:.3f} below threshold {self._llr_threshold}")
 
         return speaker
 
     @trace_info("Loading models ...")
-    def _load_models(self, force=False):
+    def _load_models(self):
         """
-        Method to load trained models
+        Method to load trained models from the model bank file.
+        Legacy per speaker .gmm pickles are loaded when there is no model bank file.
         """
-        gmm_files = [os.path.join(self._model_path, fname) for fname in
-                     os.listdir(self._model_path) if fname.endswith('.gmm')]
-
-        # If force, empty list
-        if force:
-            self._logger.debug("Cleanning models list")
-            self._models.clear()
+        self._files = {}
+        self._gmms = {}
+        self._models = self._build_models(self._scan())
 
-        # Load the Gaussian Models
-        for model in gmm_files:
-            gmm = cPickle.load(open(model, 'rb'))
-            speaker = model.split("/")[-1].split(".gmm")[0].split('-')[0]
-            
-            self._models.append((gmm, speaker))
+        for speaker in self._models[0].speakers:
             self._logger.debug(f"{speaker} loaded successfully")
 
+    def _scan(self):
+        """
+        Method to get modification stamps of model files in models path
+        @Return Dict file name: (modification time, size)
+        """
+        files = {}
+        with os.scandir(self._model_path) as entries:
+            for entry in entries:
+                if entry.name in (ModelBank.FILE_NAME, ModelBank.UBM_FILE_NAME) or entry.name.endswith('.gmm'):
+                    stat = entry.stat()
+                    files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+
+        return files
+
+    def _build_models(self, files):
+        """
+        Method to build a new (bank, background model) tuple loading only
+        files that changed since last build
+        """
+        # New, modified and removed files
+        changed = {name for name, stamp in files.items() if self._files.get(name) != stamp}
+        changed |= set(self._files) - set(files)
+        bank, ubm = getattr(self, "_models", (None, None))
+
+        if ModelBank.FILE_NAME in files:
+            if bank is None or ModelBank.FILE_NAME in changed:
+                bank = ModelBank.load(os.path.join(self._model_path, ModelBank.FILE_NAME))
+        else:
+            self._logger.warning(
+                f"{ModelBank.FILE_NAME} not found, loading legacy .gmm models. Run convert_models to build it.")
+            # Only new or modified pickles are loaded
+            self._gmms = {name: (self._gmms[name] if name in self._gmms and name not in changed
+                                 else ModelBank.load_gmm_file(os.path.join(self._model_path, name)))
+                          for name in sorted(files) if name.endswith('.gmm')}
+            if bank is None or changed - {ModelBank.UBM_FILE_NAME}:
+                bank = ModelBank.from_gmms(list(self._gmms.values()))
+
+        if ModelBank.UBM_FILE_NAME not in files:
+            ubm = None
+        elif ModelBank.UBM_FILE_NAME in changed:
+            ubm = ModelBank.load(os.path.join(self._model_path, ModelBank.UBM_FILE_NAME))
+
+        self._files = files
+
+        return bank, ubm
+
+    def reload_changed(self):
+        """
+        Method to reload model files changed since last load.
+        New models are swapped in with a single reference assignment, so
+        identifications in progress keep using the previous models.
+        @Return True if models were reloaded
+        """
+        with self._reload_lock:
+            files = self._scan()
+            if files == self._files:
+                return False
+
+            self._models = self._build_models(files)
+            self._logger.info(f"Models reloaded: {len(self._models[0])} speakers")
+
+            return True
+
     def force_reload(self):
         """
         Method to force reloading files from models path
         """
-        self._load_models(force=True)
+        with self._reload_lock:
+            self._load_models()
+
+    def start_watching(self, interval):
+        """
+        Method to start a background thread that reloads changed models
+        @interval: seconds between checks of models path
+        """
+        if self._watcher is not None:
+            return
+
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                         name="SpeakerModelsWatcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """
+        Method to stop the models watcher thread
+        """
+        if self._watcher is None:
+            return
+
+        self._stop_watching.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def _watch(self, interval):
+        """
+        Watcher thread loop
+        """
+        self._logger.debug(f"Watching {self._model_path} every {interval}s")
+        while not self._stop_watching.wait(interval):
+            try:
+                self.reload_changed()
+            except Exception as e:
+                # Keep serving current models until files are consistent
+                self._logger.error(f"Unable to reload models: {e}")
@@ -3,14 +3,17 @@
 train_models.py - File that contains training models class for voice recognition
 """
 
+import argparse
 import logging
 import numpy as np
 import warnings
-import _pickle as cPickle
-from os import path, walk
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from os import listdir, path
 from scipy.io.wavfile import read
 from sklearn.mixture import GaussianMixture as GMM
 from archie.lib.recognition.speaker_features import SpeakerFeatures
+from archie.lib.recognition.model_bank import ModelBank
+from archie.lib.recognition.feature_cache import FeatureCache
 
 warnings.filterwarnings("ignore")
 
@@ -23,7 +26,69 @@ __status__ = "Development"
 __credits__ = ["Abhijeet Kumar",
                "Speaker-identification-using-GMMs", "abhijeet.kumar@fmr.com"]
 
-# TODO: Refactor to train only one sample folder passed as argument.
+# Setting application logging level
+LOG_LEVEL = "DEBUG"
+
+
+def _extract_features(sample):
+    """
+    Function to extract features from a sample file.
+    Features are float32 as cached blocks, so training does not depend on the cache.
+    """
+    # read the audio
+    sr, audio = read(sample)
+    logging.getLogger("Voice Trainer").debug(f"Trainning with file {sample} at {sr} rate")
+    # extract 40 dimensional MFCC & delta MFCC features
+    sf = SpeakerFeatures(audio, sr)
+    return sf.extract_features().astype(np.float32)
+
+
+def _sample_features(sample_files, cache=None):
+    """
+    Generator that yields the float32 feature block of each sample file.
+    Blocks are read from the features cache when available.
+    """
+    for sample in sample_files:
+        if cache is None:
+            yield _extract_features(sample)
+        else:
+            yield cache.features(sample, SpeakerFeatures.DEFAULT_PARAMETERS, _extract_features)
+
+
+def _fit_speaker(speaker, sample_files, cache=None):
+    """
+    Function to fit the GMM of one speaker. It runs in worker processes,
+    so it only receives and returns picklable data.
+    @Return Tuple ((weights, means, precisions), speaker name, features shape)
+    """
+    # Feature blocks are concatenated once per speaker
+    features = np.concatenate(list(_sample_features(sample_files, cache)))
+
+    gmm = GMM(n_components=16, max_iter=200,
+              covariance_type='diag', n_init=3)
+    gmm.fit(features)
+
+    return (gmm.weights_, gmm.means_, gmm.precisions_), speaker, features.shape
+
+
+def _adapt_speaker(speaker, sample_files, ubm_file, relevance_factor, cache=None):
+    """
+    Function to derive the model of one speaker by MAP adaptation of the
+    universal background model. It runs in worker processes.
+    @Return Tuple ((weights, means, precisions), speaker name, features shape)
+    """
+    features = np.concatenate(list(_sample_features(sample_files, cache)))
+
+    ubm = ModelBank.load(ubm_file)
+
+    return ubm.adapt(features, relevance_factor), speaker, features.shape
+
+
+class TrainModelsUBMNotFoundException(Exception):
+    """ Custom exception for a missing universal background model """
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}"
 
 
 class TrainModels():
@@ -31,9 +96,16 @@ class TrainModels():
     Train models class
     """
 
-    def __init__(self, samples_path, models_path, num_samples) -> None:
+    def __init__(self, samples_path, models_path, num_samples, workers=1,
+                 cache_path=None, cache_size=512 * 1024 * 1024,
+                 ubm_components=64, relevance_factor=16.0) -> None:
         """
         Default constructor
+        @workers: number of processes training speakers in parallel
+        @cache_path: features cache folder. Features are not cached if None.
+        @cache_size: max features cache size in bytes
+        @ubm_components: number of components of the universal background model
+        @relevance_factor: MAP adaptation relevance factor
         """
         # Initialize logger name
         self._logger = logging.getLogger("Voice Trainer")
@@ -43,70 +115,186 @@ class TrainModels():
         self._models_path = models_path
         # Set number of samples to train per speaker
         self._num_samples = num_samples
+        # Set number of training processes
+        self._workers = workers
+        # Set features cache
+        self._cache = FeatureCache(cache_path, cache_size) if cache_path else None
+        # Set universal background model parameters
+        self._ubm_components = ubm_components
+        self._relevance_factor = relevance_factor
+        self._ubm_file = path.join(self._models_path, ModelBank.UBM_FILE_NAME)
 
     def __repr__(self) -> str:
         """ Return a printed version """
-        return f"{self.__class__.__name__}, samples path: {self._samples_path}, models path: {self._models_path}, samples: {self._num_samples}"
+        return f"{self.__class__.__name__}, samples path: {self._samples_path}, models path: {self._models_path}, samples: {self._num_samples}, workers: {self._workers}"
 
-    def train(self) -> None:
+    def train(self, speakers=None, adapt=False) -> None:
         """
         Method to launch trainning
+        @speakers: speaker names to train. All sample folders are trained if None.
+        @adapt: derive speakers from the universal background model instead of fitting them
         """
-        count = 1
+        self._logger.debug(f"Trainning from {self._samples_path}")
 
-        # Extracting features for each speaker (5 files per speakers)
-        features = np.asarray(())
+        if adapt and not path.exists(self._ubm_file):
+            raise TrainModelsUBMNotFoundException(
+                f"{self._ubm_file} not found. Train the universal background model first.")
+
+        jobs = ((speaker, sample_files) for speaker, sample_files in self._sample_folders()
+                if speakers is None or speaker in speakers)
+
+        if adapt:
+            function, arguments = _adapt_speaker, (self._ubm_file, self._relevance_factor, self._cache)
+        else:
+            function, arguments = _fit_speaker, (self._cache,)
+
+        if self._workers > 1:
+            # Independent speakers are fitted in a process pool
+            with ProcessPoolExecutor(max_workers=self._workers) as executor:
+                futures = [executor.submit(function, speaker, sample_files, *arguments)
+                           for speaker, sample_files in jobs]
+                results = [future.result() for future in as_completed(futures)]
+        else:
+            results = [function(speaker, sample_files, *arguments)
+                       for speaker, sample_files in jobs]
+
+        if not results:
+            self._logger.warning(
+                f"No speaker trained: no sample folder with {self._num_samples} samples matches {speakers or 'any speaker'}")
+            return
+
+        for _, speaker, shape in results:
+            self._logger.info(
+                f"Modeling completed for speaker: {speaker} with data point = {shape}")
+
+        self._save_models([(components, speaker) for components, speaker, _ in results])
+
+    def train_ubm(self) -> None:
+        """
+        Method to train the universal background model over all speakers' samples
+        """
+        self._logger.info(f"Trainning universal background model from {self._samples_path}")
+
+        features = np.concatenate([block for _, sample_files in self._sample_folders()
+                                   for block in _sample_features(sample_files, self._cache)])
+
+        gmm = GMM(n_components=self._ubm_components, max_iter=200,
+                  covariance_type='diag')
+        gmm.fit(features)
+
+        ModelBank.from_gmms([(gmm, "ubm")]).save(self._ubm_file)
+        self._logger.info(
+            f"Universal background model saved to {self._ubm_file} with data point = {features.shape}")
+
+    def _sample_folders(self):
+        """
+        Generator that yields sample files of each speaker folder in samples path
+        @Return Tuple (speaker name, sample files), speaker named as in converted models
+        """
+        # Each folder in samples path holds the samples of one speaker
+        for dirname in sorted(listdir(self._samples_path)):
+            sample_folder = path.join(self._samples_path, dirname)
+            if not path.isdir(sample_folder):
+                continue
+
+            self._logger.debug(f"Entering sample folder {sample_folder}")
+
+            sample_files = sorted(path.join(sample_folder, sample)
+                                  for sample in listdir(sample_folder)
+                                  if path.isfile(path.join(sample_folder, sample)))
+
+            if len(sample_files) < self._num_samples:
+                self._logger.warning(
+                    f"Skipping {dirname}: {len(sample_files)} samples, {self._num_samples} needed")
+                continue
+
+            yield ModelBank.speaker_name(dirname), sample_files
+
+    def _save_models(self, models):
+        """
+        Method to merge trained models into the model bank file
+        @models: list of Tuple ((weights, means, precisions), speaker name)
+        """
+        bank_file = path.join(self._models_path, ModelBank.FILE_NAME)
+        bank = ModelBank.from_components([speaker for _, speaker in models],
+                                         [c[0] for c, _ in models],
+                                         [c[1] for c, _ in models],
+                                         [c[2] for c, _ in models])
+
+        # Keep speakers that have not been retrained
+        if path.exists(bank_file):
+            bank = ModelBank.load(bank_file).merge(bank)
+
+        bank.save(bank_file)
+        self._logger.info(f"Model bank saved to {bank_file} with {len(bank)} speakers")
+
+
+def configure_logger():
+    """
+    Method to configure logging
+    """
+    logargs = {
+        'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        'datefmt': '%Y-%m-%d %H:%M:%S'}
+
+    logargs["level"] = LOG_LEVEL
+
+    logging.basicConfig(**logargs)
+
+    return logging.getLogger("Train models util")
+
+
+def main():
+    """ Main fucntion """
+
+    # Configure logger
+    logger = configure_logger()
+
+    # Configure arguments
+    parser = argparse.ArgumentParser(description="Train speaker models")
+    parser.add_argument('samples_path',
+                        help="Path with one samples folder per speaker.")
+    parser.add_argument('models_path',
+                        help="Path where the model bank is stored.")
+    parser.add_argument('-n', '--num_samples',
+                        default=5, type=int,
+                        help="Minimum number of samples per speaker.")
+    parser.add_argument('-w', '--workers',
+                        default=1, type=int,
+                        help="Number of processes training speakers in parallel.")
+    parser.add_argument('-s', '--speakers',
+                        nargs='+',
+                        help="Speakers to train. All speakers are trained if not set.")
+    parser.add_argument('-c', '--cache_path',
+                        help="Features cache path. Features are not cached if not set.")
+    parser.add_argument('--cache_size',
+                        default=512, type=int,
+                        help="Max features cache size in MB.")
+    parser.add_argument('-u', '--ubm',
+                        action='store_true',
+                        help="Train the universal background model over all speakers first.")
+    parser.add_argument('-m', '--map',
+                        action='store_true',
+                        help="Enroll speakers by MAP adaptation of the universal background model.")
+    parser.add_argument('--ubm_components',
+                        default=64, type=int,
+                        help="Number of components of the universal background model.")
+    parser.add_argument('--relevance_factor',
+                        default=16.0, type=float,
+                        help="MAP adaptation relevance factor. Higher values keep speakers closer to the universal background model.")
+
+    args = parser.parse_args()
+
+    logger.info(f"Training speakers from {args.samples_path} ...")
+    trainer = TrainModels(args.samples_path, args.models_path,
+                          args.num_samples, args.workers,
+                          args.cache_path, args.cache_size * 1024 * 1024,
+                          args.ubm_components, args.relevance_factor)
+    if args.ubm:
+        trainer.train_ubm()
+    trainer.train(args.speakers, args.map)
+    logger.info("ok")
 
-        self._logger.debug(f"Trainning from {self._samples_path}")
 
-        # Walk in data samples directory
-        for dirpath, dirname, filenames in walk(self._samples_path):
-            # For each directory, concatenate root path before
-            dirnames = map(lambda item: path.join(dirpath, item), dirname)
-
-            # Walk in each samples directory
-            for sample_folder in list(dirnames):
-                # Walk in sample files
-                for _, _, samples in walk(sample_folder):
-                    # For each file, concatenate root path before
-                    sample_files = map(lambda item: path.join(
-                        sample_folder, item), samples)
-                    # Get samples folder name from complete path
-                    sample_folder_name = path.basename(
-                        path.normpath(sample_folder))
-
-                    self._logger.debug(
-                        f"Entering sample folder {sample_folder}")
-                    # For each file
-                    for sample in sample_files:
-                        # read the audio
-                        sr, audio = read(sample)
-                        self._logger.debug(
-                            f"Trainning with file {sample} at {sr} rate")
-                        # extract 40 dimensional MFCC & delta MFCC features
-                        sf = SpeakerFeatures(audio, sr)
-                        vector = sf.extract_features()
-
-                        if features.size == 0:
-                            features = vector
-                        else:
-                            features = np.vstack((features, vector))
-
-                        # when features of <num_samples> files of speaker are concatenated, then do model training
-                        if count == self._num_samples:
-                            gmm = GMM(n_components=16, max_iter=200,
-                                      covariance_type='diag', n_init=3)
-                            gmm.fit(features)
-
-                            # dumping the trained gaussian model
-                            picklefile = path.join(
-                                self._models_path, sample_folder_name + ".gmm")
-                            self._logger.debug(
-                                f"Serialized file: {picklefile}")
-                            with open(picklefile, 'wb') as dump:
-                                cPickle.dump(gmm, dump)
-                                self._logger.info(
-                                    f"Modeling completed for speaker: {picklefile} with data point = {features.shape}")
-                            features = np.asarray(())
-                            count = 0
-                        count = count + 1
+if __name__ == "__main__":
+    main()
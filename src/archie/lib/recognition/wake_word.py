@@ -0,0 +1,138 @@
+# encoding:utf-8
+"""
+wake_word.py - File that contains the on-device wake word detector
+"""
+
+import logging
+import os
+import numpy as np
+from scipy.io.wavfile import read
+from archie.lib.recognition.speaker_features import SpeakerFeatures
+from archie.utils.decorators import trace_info
+
+__authors__ = "Marco Espinosa"
+__license__ = "MIT License"
+__version__ = "1.0"
+__maintainer__ = "Marco Espinosa"
+__email__ = "hi@marcoespinosa.es"
+__status__ = "Development"
+
+
+class WakeWordTemplatesNotFoundException(Exception):
+    """ Custom exception for a wake word detector without templates """
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}"
+
+
+class WakeWordDetector():
+    """
+    Class to spot the wake word in captured audio without cloud recognition.
+    Audio features (MFCC + delta from SpeakerFeatures) are matched against
+    recorded wake word templates with subsequence dynamic time warping, so the
+    wake word is found anywhere in the utterance.
+    """
+
+    @trace_info("Initializing wake word detector ...")
+    def __init__(self, templates_path, threshold=0, deviations=2.0) -> None:
+        """
+        Default constructor
+        @templates_path: folder with wav recordings of the wake word
+        @threshold: max normalized distance to accept the wake word.
+        Calibrated from templates if 0.
+        @deviations: standard deviations over the mean template to template
+        distance of the calibrated threshold
+        """
+        # Initialize logger name
+        self._logger = logging.getLogger(self.__class__.__name__)
+        # Set templates path
+        self._templates_path = templates_path
+        # Load templates
+        self._templates = self._load_templates()
+        # Set calibration deviations
+        self._deviations = deviations
+        # Set threshold
+        self._threshold = threshold if threshold else self._calibrate()
+        self._logger.debug(f"Wake word threshold: {self._threshold:.3f}")
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, templates path: {self._templates_path}, templates: {len(self._templates)}"
+
+    def _load_templates(self):
+        """
+        Method to extract features of every wake word recording
+        """
+        templates = []
+        for fname in sorted(os.listdir(self._templates_path)):
+            if fname.endswith('.wav'):
+                rate, audio = read(os.path.join(self._templates_path, fname))
+                templates.append(SpeakerFeatures(audio, rate).extract_features())
+                self._logger.debug(f"Wake word template {fname} loaded")
+
+        if not templates:
+            raise WakeWordTemplatesNotFoundException(
+                f"No wake word recordings found in {self._templates_path}")
+
+        return templates
+
+    def _calibrate(self):
+        """
+        Method to compute a threshold from distances between templates,
+        as their mean plus deviations standard deviations
+        """
+        if len(self._templates) < 2:
+            raise WakeWordTemplatesNotFoundException(
+                "At least two wake word recordings are needed to calibrate the threshold")
+
+        distances = [self._distance(template, features)
+                     for i, template in enumerate(self._templates)
+                     for j, features in enumerate(self._templates) if i != j]
+
+        return np.mean(distances) + self._deviations * np.std(distances)
+
+    @staticmethod
+    def _distance(template, features):
+        """
+        Method to compute the subsequence DTW distance of a template inside features,
+        normalized by template length.
+        Every step moves one template frame and 0, 1 or 2 utterance frames, so each
+        template frame is computed at once over all utterance frames.
+        """
+        # Euclidean distances between every template frame and every utterance frame
+        cost = np.sqrt(np.maximum(
+            (template ** 2).sum(axis=1)[:, None] + (features ** 2).sum(axis=1)[None, :]
+            - 2 * template @ features.T, 0))
+
+        # Wake word can start at any utterance frame
+        accumulated = cost[0].copy()
+        for row in cost[1:]:
+            previous = accumulated
+            accumulated = previous.copy()
+            accumulated[1:] = np.minimum(accumulated[1:], previous[:-1])
+            accumulated[2:] = np.minimum(accumulated[2:], previous[:-2])
+            accumulated += row
+
+        return accumulated.min() / len(template)
+
+    def score(self, data, sample_rate):
+        """
+        Method to get the best distance of audio to wake word templates
+        @data: raw 16 bits PCM bytes or a NumPy array
+        @sample_rate: audio sample rate
+        """
+        audio = data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype='<i2')
+        features = SpeakerFeatures(audio, sample_rate).extract_features()
+
+        return min(self._distance(template, features) for template in self._templates)
+
+    def detect(self, data, sample_rate):
+        """
+        Method to check if the wake word was said in audio
+        @data: raw 16 bits PCM bytes or a NumPy array
+        @sample_rate: audio sample rate
+        """
+        distance = self.score(data, sample_rate)
+        self._logger.debug(f"Wake word distance: {distance:.3f}")
+
+        return distance <= self._threshold
@@ -3,11 +3,17 @@
 """
 File that servers weather service
 """
+import asyncio
 import logging
 import uvicorn
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from os import path
+from typing import List
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from urllib import parse
 from archie.utils.statistics import SpeechToTextStats
@@ -15,8 +21,49 @@ from archie.utils.statistics import SpeechToTextStats
 # Configure logger instance
 logger = logging.getLogger("MonitorService")
 
+# TODO: Change path when installed data in var
+# Statistics database path
+db_path = r"/Users/marco/Documents/Proyectos/P017-Assistant/archie/data/db"
+
+# Database interface and executor for blocking database work, set on startup
+stats = None
+executor = None
+
+
+@asynccontextmanager
+async def lifespan(app):
+    '''
+    Function to open the statistics database once for the service lifetime
+    '''
+    global stats, executor
+
+    # Initialize statics datababase connection
+    stats = SpeechToTextStats(db_path, "statistics.db", wal=True)
+    # Create counters on databases of previous versions
+    if stats.migrate():
+        logger.info("Statistics database migrated to counters")
+    executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="MonitorDatabase")
+    yield
+    executor.shutdown()
+    stats.close()
+
+
+async def _run_blocking(function, *args):
+    '''
+    Function to run blocking database work out of the event loop
+    '''
+    return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+
+
+class QueriesBatch(BaseModel):
+    '''
+    Batch of recognized requests
+    '''
+    queries: List[str]
+
+
 # Create FastAPI instance
-monitor = FastAPI()
+monitor = FastAPI(lifespan=lifespan)
 
 # Allowed origins
 origins = [
@@ -37,6 +84,17 @@ monitor.add_middleware(
 
 
 
+@monitor.get("/ready")
+async def readiness():
+    '''
+    Function to check if the statistics database is open
+    @returns: json string, status 503 until ready
+    '''
+    if stats is None:
+        return JSONResponse({"ready": "False"}, status_code=503)
+
+    return {"ready": "True"}
+
 @monitor.get("/stats/requests/getcurrent")
 async def stats_requests_getcurrent():
     '''
@@ -44,23 +102,17 @@ async def stats_requests_getcurrent():
     @returns: json string
     '''
     logger.info(f'Current month requests requested')
-    
+
     val = 0
     res = 0
 
-
     # Fetch current month requests
     try:
-        # TODO: Change path when installed data in var
-        # Initialize statics datababase connection
-        stats = SpeechToTextStats(r"/Users/marco/Documents/Proyectos/P017-Assistant/archie/data/db", "statistics.db")
-
-        val = stats.get_current_month_requests()
+        val = await _run_blocking(stats.get_current_month_requests)
     except:
         logger.error(f"Unable to fetch requests stats from database")
         res = 1
 
-
     return {"val": f"{val}", "res": f"{res}"}
 
 @monitor.get("/stats/requests/update/{query}")
@@ -71,19 +123,29 @@ async def stats_requests_update(query):
     '''
     logger.info(f'Update requests')
 
-    # TODO: Change path when installed data in var
-    # Initialize statics datababase connection
-    stats = SpeechToTextStats(r"/Users/marco/Documents/Proyectos/P017-Assistant/archie/data/db", "statistics.db")
-
-    stats.update(parse.unquote_plus(query))
+    await _run_blocking(stats.update, parse.unquote_plus(query))
 
     return {"res": "0"}
 
+@monitor.post("/stats/requests/update")
+async def stats_requests_update_batch(batch: QueriesBatch):
+    '''
+    Function to update many requests at once
+    @returns: json string
+    '''
+    logger.info(f'Update {len(batch.queries)} requests')
+
+    await _run_blocking(stats.update_many, batch.queries)
+
+    return {"res": "0", "count": f"{len(batch.queries)}"}
+
 
 def main():
     '''
     Function Main
     '''
+    global db_path
+
     # Configure arguments
     parser = argparse.ArgumentParser(description="Monitor service")
     parser.add_argument('--host',
@@ -92,12 +154,18 @@ def main():
     parser.add_argument('--port',
                         help="Port where running the service.",
                         type=int)
+    parser.add_argument('--db_path',
+                        default=db_path,
+                        help="Path of the statistics database.")
 
     args = parser.parse_args()
     logger.debug(f"Arguments: {args.host}:{args.port}")
 
+    # Set statistics database path
+    db_path = args.db_path
+
     # Launch service
-    uvicorn.run("service:monitor", host=args.host, port=args.port)
+    uvicorn.run(monitor, host=args.host, port=args.port)
 
 
 if __name__ == "__main__":
@@ -7,17 +7,74 @@ spawn.py - File that contains class to spawn services
 import subprocess
 import logging
 import signal
+import threading
+import time
+import requests
 from os import path
-from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from archie.utils.decorators import trace_info
 from archie.config.base import Configuration
 
 
+class ServicesNotReadyException(Exception):
+    """ Custom exception to handler services not ready before their deadline """
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}"
+
+class SupervisedService():
+    """
+    Class that holds a spawned service process and its supervision state
+    """
+
+    def __init__(self, name, config, restart_delay) -> None:
+        """
+        Default constructor
+        @restart_delay: seconds to wait before the first restart
+        """
+        # Set service name and configuration
+        self.name = name
+        self.config = config
+        # Running process, monotonic time it was started at and it answered its readiness endpoint
+        self.process = None
+        self.started_at = None
+        self.ready_at = None
+        # Restarts done, delay before the next one and time it is due, if exited
+        self.restarts = 0
+        self.restart_delay = restart_delay
+        self.restart_at = None
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, service: {self.name}, restarts: {self.restarts}"
+
 class SpawnServices():
     """
-    Class to spawn services
+    Class to spawn services.
+    Once ready, services are supervised: a service that exits is restarted
+    with exponential backoff, and stop drains every service before killing it.
+    Restarted services are probed again, backoff is only reset once they are ready.
     """
 
+    # Seconds to wait for a service without ready_timeout in configuration
+    _READY_TIMEOUT = 60
+    # Readiness probes backoff, first and max delay between probes in seconds
+    _FIRST_PROBE_DELAY = 0.05
+    _MAX_PROBE_DELAY = 0.5
+    # Seconds a probe request waits for an answer
+    _PROBE_TIMEOUT = 1
+    # Seconds a service without stop_timeout in configuration has to exit after SIGINT
+    _STOP_TIMEOUT = 10
+    # Seconds between supervisor checks
+    _SUPERVISE_INTERVAL = 1
+    # Restarts backoff, first and max delay in seconds
+    _FIRST_RESTART_DELAY = 1
+    _MAX_RESTART_DELAY = 60
+    # Seconds running after which a service restart backoff is reset
+    _STABLE_UPTIME = 60
+    # Seconds between supervision stats logs
+    _STATS_INTERVAL = 300
+
     def __init__(self, config:Configuration) -> None:
         """
         Default constructor
@@ -27,8 +84,8 @@ class SpawnServices():
 
         # Set config instance
         self._config = config
-        
-        # Load python executable
+
+        # Load python executable
         self._python_exe = self._config.services.python_exe
 
         # Load services path
@@ -37,12 +94,19 @@ class SpawnServices():
         # Load list of available services
         self._services = self._config.services.services
 
-        # Initialize spawned services list
-        self._spawned_services = deque([])
+        # Initialize spawned services, by name
+        self._spawned_services = {}
+
+        # Serialize supervisor and stop on spawned services
+        self._lock = threading.RLock()
+
+        # Supervisor thread and its stop flag
+        self._supervisor = None
+        self._stopping = threading.Event()
 
         # Initialize service main file name
         self._service_main_file = "service.py"
-    
+
     def __repr__(self) -> str:
         """ Return a printed version """
         return f"{self.__class__.__name__}, services path: {self._services_path}"
@@ -55,35 +119,247 @@ class SpawnServices():
             if config.get("enabled"):
                 self._spawn_service(service, config)
 
-    def stop(self):
+    def wait_ready(self):
         """
-        Method to stop spawned services
+        Method to wait until every spawned service answers its readiness endpoint.
+        Services are probed concurrently, each one until its own deadline.
+        @return dict of service and seconds from spawn to ready
         """
-        services = self._spawned_services
+        with self._lock:
+            services = list(self._spawned_services.values())
+        if not services:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=len(services), thread_name_prefix="ReadinessProbe") as executor:
+            futures = {service.name: executor.submit(self._wait_service, service.process, service.name,
+                                                     service.started_at)
+                       for service in services}
+
+        startup = {service: future.result() for service, future in futures.items()}
+        for service in services:
+            if startup[service.name] is not None:
+                service.ready_at = service.started_at + startup[service.name]
+        not_ready = [service for service, seconds in startup.items() if seconds is None]
+        if not_ready:
+            raise ServicesNotReadyException(f"Services not ready: {', '.join(not_ready)}")
+
+        return startup
+
+    def _wait_service(self, process, service, spawned_at):
+        """
+        Method to probe a service readiness endpoint with exponential backoff
+        @return seconds from spawn to ready, None if the deadline expired or the service exited
+        """
+        config = self._services[service]
+        url = f"http://{config.get('host')}:{config.get('port')}/ready"
+        deadline = spawned_at + config.get("ready_timeout", self._READY_TIMEOUT)
+        delay = self._FIRST_PROBE_DELAY
+
+        while True:
+            if process.poll() is not None:
+                self._logger.error(f"{service} exited with code {process.returncode} before being ready")
+                return None
 
-        for process, service in services:
             try:
-                # Send CTRL+c to kill the child process from su -
-                self._logger.warning(f"Sending stop signal to {service}...")
-                process.send_signal(signal.SIGINT)
-                self._logger.info(f"{service} stopped")
+                if requests.get(url, timeout=self._PROBE_TIMEOUT).status_code == 200:
+                    startup = time.monotonic() - spawned_at
+                    self._logger.info(f"{service} ready in {startup:.2f}s")
+                    return startup
+            except requests.RequestException:
+                # Service not listening yet
+                pass
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._logger.error(f"{service} not ready after {config.get('ready_timeout', self._READY_TIMEOUT)}s")
+                return None
+
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, self._MAX_PROBE_DELAY)
+
+    def supervise(self):
+        """
+        Method to start supervising spawned services in background
+        """
+        if self._supervisor is not None:
+            return
+
+        self._stopping.clear()
+        self._supervisor = threading.Thread(target=self._supervise, name="ServicesSupervisor", daemon=True)
+        self._supervisor.start()
+
+    def _supervise(self):
+        """
+        Supervisor thread loop
+        """
+        stats_logged_at = time.monotonic()
 
-            except subprocess.TimeoutExpired:
-                self._logger.error(f"Stopping service {service} timeout!")
+        while not self._stopping.wait(self._SUPERVISE_INTERVAL):
+            with self._lock:
+                for service in self._spawned_services.values():
+                    self._check_service(service)
+
+            if time.monotonic() - stats_logged_at >= self._STATS_INTERVAL:
+                self._log_stats()
+                stats_logged_at = time.monotonic()
+
+    def _check_service(self, service):
+        """
+        Method to restart a service that exited, once its backoff delay elapsed
+        """
+        now = time.monotonic()
+        code = service.process.poll()
+
+        if code is None:
+            # Ready and running long enough, next crash is restarted without delay increase
+            if service.ready_at is not None and now - service.ready_at >= self._STABLE_UPTIME:
+                service.restart_delay = self._FIRST_RESTART_DELAY
+            return
+
+        if service.restart_at is None:
+            self._logger.error(f"{service.name} exited with code {code}, restarting in {service.restart_delay}s")
+            service.restart_at = now + service.restart_delay
+            service.restart_delay = min(service.restart_delay * 2, self._MAX_RESTART_DELAY)
+        elif now >= service.restart_at:
+            service.restarts += 1
+            service.restart_at = None
+            try:
+                self._start_process(service)
+                self._logger.warning(f"{service.name} restarted, {service.restarts} restarts")
+            except OSError as e:
+                # Process still exited, retried on next check with the increased delay
+                self._logger.error(f"Unable to restart {service.name}: {e}")
+                return
+
+            # Probed aside, so other services are still supervised meanwhile
+            threading.Thread(target=self._wait_restarted, args=(service, service.process),
+                             name=f"ReadinessProbe-{service.name}", daemon=True).start()
+
+    def _wait_restarted(self, service, process):
+        """
+        Method to wait until a restarted service is ready.
+        A service not ready before its deadline is killed, so it is restarted with the increased delay.
+        """
+        startup = self._wait_service(process, service.name, service.started_at)
+
+        with self._lock:
+            # Restarted again or being stopped meanwhile
+            if service.process is not process or self._stopping.is_set():
+                return
+
+            if startup is not None:
+                service.ready_at = service.started_at + startup
+            elif process.poll() is None:
+                self._logger.error(f"Killing {service.name}, not ready after restart")
                 process.kill()
 
-            self._spawned_services.remove((process, service))
+    def stats(self):
+        """
+        Method to get supervision stats of every spawned service
+        @return dict of service and dict with pid, running, uptime in seconds, restarts and rss in bytes
+        """
+        with self._lock:
+            services = list(self._spawned_services.values())
+
+        stats = {}
+        for service in services:
+            running = service.process.poll() is None
+            stats[service.name] = {
+                "pid": service.process.pid,
+                "running": running,
+                "uptime": time.monotonic() - service.started_at if running else 0,
+                "restarts": service.restarts,
+                "rss": self._rss(service.process.pid) if running else 0}
+
+        return stats
+
+    def _log_stats(self):
+        """
+        Method to log supervision stats
+        """
+        for service, stats in self.stats().items():
+            self._logger.info(f"{service} - pid: {stats['pid']}, running: {stats['running']}, "
+                              f"uptime: {stats['uptime']:.0f}s, restarts: {stats['restarts']}, "
+                              f"rss: {stats['rss'] / 2 ** 20:.1f} MiB")
+
+    @staticmethod
+    def _rss(pid):
+        """
+        Function to get the resident memory of a process, from /proc on Linux or ps elsewhere
+        @return bytes, 0 if unknown
+        """
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+
+        try:
+            output = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True, timeout=1)
+            return int(output.stdout.strip()) * 1024
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            return 0
+
+    def stop(self):
+        """
+        Method to stop spawned services.
+        Every service gets SIGINT to drain at once, then is killed if it has not
+        exited within its stop_timeout.
+        """
+        # Stop supervision first, so stopping services are not restarted
+        self._stopping.set()
+        if self._supervisor is not None:
+            self._supervisor.join()
+            self._supervisor = None
+
+        with self._lock:
+            services = [service for service in self._spawned_services.values() if service.process.poll() is None]
+            if services:
+                self._log_stats()
+
+            for service in services:
+                # Send CTRL+c to kill the child process from su -
+                self._logger.warning(f"Sending stop signal to {service.name}...")
+                try:
+                    service.process.send_signal(signal.SIGINT)
+                except ProcessLookupError:
+                    pass
+
+            stop_at = time.monotonic()
+            for service in services:
+                timeout = service.config.get("stop_timeout", self._STOP_TIMEOUT)
+                try:
+                    service.process.wait(timeout=max(0, stop_at + timeout - time.monotonic()))
+                    self._logger.info(f"{service.name} stopped")
+                except subprocess.TimeoutExpired:
+                    self._logger.error(f"Stopping service {service.name} timeout! Killing it")
+                    service.process.kill()
+                    service.process.wait()
+
+            self._spawned_services.clear()
 
     def _spawn_service(self, service, config):
         """
         Method to spawn services
         """
         self._logger.info(f"Spawning service {service} ...")
+        supervised = SupervisedService(service, config, self._FIRST_RESTART_DELAY)
         # Launching service
-        spawned = subprocess.Popen([self._python_exe, path.join(
-            self._services_path, service, self._service_main_file),
-            "--host", config.get("host"),
-            "--port", str(config.get("port"))])
-        # Save service handler to spawned services list
-        self._spawned_services.append((spawned, service))
+        self._start_process(supervised)
+        # Save service handler to spawned services
+        with self._lock:
+            self._spawned_services[service] = supervised
         self._logger.info("ok")
+
+    def _start_process(self, service):
+        """
+        Method to start the process of a service
+        """
+        service.process = subprocess.Popen([self._python_exe, path.join(
+            self._services_path, service.name, self._service_main_file),
+            "--host", service.config.get("host"),
+            "--port", str(service.config.get("port"))])
+        service.started_at = time.monotonic()
+        service.ready_at = None
@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+# encoding:utf-8
+"""
+File that contains the predictions micro-batcher
+"""
+
+import asyncio
+import logging
+
+
+class MicroBatcherStoppedException(Exception):
+    """ Custom exception for requests not predicted because the batcher stopped """
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}"
+
+
+class MicroBatcher():
+    """
+    Class that coalesces concurrent prediction requests.
+    Queries are gathered until max_batch_size queries are waiting or the oldest
+    one waited max_wait_ms, then one batched inference runs and every awaiting
+    request gets its own prediction. Requests still pending on stop fail with
+    MicroBatcherStoppedException.
+    """
+
+    def __init__(self, predict, executor, max_batch_size=32, max_wait_ms=5) -> None:
+        """
+        Default constructor
+        @predict: function returning an array of predictions for a list of queries
+        @executor: executor where inference runs
+        """
+        # Create logger instance
+        self._logger = logging.getLogger("MicroBatcher")
+        # Set inference
+        self._predict = predict
+        self._executor = executor
+        # Set batching parameters
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        # Waiting (query, future) pairs
+        self._queue = None
+        # Batching task
+        self._task = None
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, max batch size: {self._max_batch_size}, max wait: {self._max_wait * 1000:.0f} ms"
+
+    def start(self):
+        """
+        Method to start the batching task in the running event loop
+        """
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Method to stop the batching task, failing the requests it did not predict
+        """
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Waiting requests would never be predicted
+        while not self._queue.empty():
+            self._fail([self._queue.get_nowait()])
+
+    @staticmethod
+    def _fail(batch):
+        """
+        Method to fail the requests of a batch not yet answered
+        """
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(MicroBatcherStoppedException("Micro-batcher stopped"))
+
+    async def predict(self, query):
+        """
+        Method to get the prediction of one query
+        """
+        if self._task is None:
+            raise MicroBatcherStoppedException("Micro-batcher not running")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, future))
+
+        return await future
+
+    async def predict_many(self, queries):
+        """
+        Method to get the predictions of many queries. They share batches with concurrent requests.
+        """
+        return await asyncio.gather(*(self.predict(query) for query in queries))
+
+    async def _run(self):
+        """
+        Batching task loop
+        """
+        loop = asyncio.get_running_loop()
+        batch = []
+
+        try:
+            while True:
+                # Wait for a first query, then gather more until batch is full or wait expires
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self._max_wait
+
+                while len(batch) < self._max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                # Requests cancelled while waiting are not predicted
+                batch = [(query, future) for query, future in batch if not future.done()]
+                if not batch:
+                    continue
+
+                self._logger.debug(f"Running batch of {len(batch)} queries")
+                try:
+                    predictions = await loop.run_in_executor(
+                        self._executor, self._predict, [query for query, _ in batch])
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                for (_, future), prediction in zip(batch, predictions):
+                    if not future.done():
+                        future.set_result(prediction)
+        except asyncio.CancelledError:
+            # Requests of the batch in progress are failed too
+            self._fail(batch)
+            raise
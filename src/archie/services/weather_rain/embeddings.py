@@ -0,0 +1,211 @@
+#!/usr/bin/python3
+# encoding:utf-8
+"""
+File that contains the binary word embeddings store
+"""
+
+import argparse
+import logging
+from os import path
+import numpy as np
+
+# Setting application logging level
+LOG_LEVEL = "INFO"
+
+
+class Embeddings():
+    """
+    Class that provides word vectors from a binary embeddings store.
+    The store is written once by convert from the text embeddings file:
+    <prefix>.vectors.npy is the float32 matrix of vectors, in file order,
+    <prefix>.words.npy the vocabulary as sorted UTF-8 byte strings and
+    <prefix>.rows.npy the matrix row of every sorted word.
+    Every file is memory mapped, so loading reads nothing and a lookup
+    only touches the pages of the binary search and of the gathered rows.
+    """
+
+    def __init__(self, prefix) -> None:
+        """
+        Default constructor
+        @prefix: store files path without suffix
+        """
+        # Create logger instance
+        self._logger = logging.getLogger("Embeddings")
+
+        # Set store prefix
+        self._prefix = prefix
+
+        # Memory mapped arrays, loaded by load
+        self._vectors = None
+        self._words = None
+        self._rows = None
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, store: {self._prefix}"
+
+    @staticmethod
+    def files(prefix):
+        """
+        Return vectors, words and rows file of a store
+        """
+        return [f"{prefix}.{name}.npy" for name in ("vectors", "words", "rows")]
+
+    @staticmethod
+    def exists(prefix):
+        """
+        Return if the store files exist
+        """
+        return all(path.exists(file) for file in Embeddings.files(prefix))
+
+    @property
+    def vectors(self):
+        """
+        Return vectors
+        """
+        return self._vectors
+
+    @property
+    def dim(self):
+        """
+        Return dim
+        """
+        return self._vectors.shape[1]
+
+    def __len__(self) -> int:
+        """ Return number of words """
+        return len(self._words)
+
+    def load(self):
+        """
+        Method to memory map the store
+        """
+        if self._vectors is not None:
+            return
+
+        vectors_file, words_file, rows_file = self.files(self._prefix)
+        self._vectors = np.load(vectors_file, mmap_mode='r')
+        self._words = np.load(words_file, mmap_mode='r')
+        self._rows = np.load(rows_file, mmap_mode='r')
+        self._logger.debug(f"Mapped {len(self)} word vectors of {self.dim} dimensions")
+
+    def lookup(self, words):
+        """
+        Method to get the rows of many words with one binary search
+        @words: list of strings
+        @return array of rows, -1 for missing words
+        """
+        self.load()
+
+        encoded = [word.encode("utf-8") for word in words]
+        rows = np.full(len(encoded), -1, dtype=np.int64)
+
+        # Words wider than the store ones are missing, and would be truncated by the cast
+        width = self._words.dtype.itemsize
+        candidates = np.array([i for i, word in enumerate(encoded) if len(word) <= width], dtype=np.int64)
+        if len(candidates) == 0:
+            return rows
+
+        queries = np.array([encoded[i] for i in candidates], dtype=self._words.dtype)
+        positions = np.searchsorted(self._words, queries)
+        positions = np.minimum(positions, len(self._words) - 1)
+        found = self._words[positions] == queries
+        rows[candidates[found]] = self._rows[positions[found]]
+
+        return rows
+
+
+def _read_lines(text_file):
+    """
+    Function to read a text embeddings file, one word and its values per line.
+    A word2vec count and dimension header is skipped.
+    @return generator of word and values lists
+    """
+    with open(text_file, encoding="utf-8") as f:
+        for number, line in enumerate(f):
+            values = line.split()
+            if number == 0 and len(values) == 2:
+                continue
+            yield values
+
+
+def convert(text_file, prefix, logger):
+    """
+    Function to convert a text embeddings file in to a binary store
+    """
+    # First pass, vectors dimension and count and widest word
+    dim = None
+    count = 0
+    width = 1
+    for values in _read_lines(text_file):
+        if dim is None:
+            dim = len(values) - 1
+        if len(values) == dim + 1:
+            count += 1
+            width = max(width, len(values[0].encode("utf-8")))
+
+    logger.info(f"Converting {count} vectors of {dim} dimensions ...")
+    vectors_file, words_file, rows_file = Embeddings.files(prefix)
+
+    # Second pass, vectors written straight in to the mapped matrix
+    vectors = np.lib.format.open_memmap(vectors_file, mode="w+", dtype=np.float32, shape=(count, dim))
+    words = np.empty(count, dtype=f"S{width}")
+    row = 0
+    skipped = 0
+    for values in _read_lines(text_file):
+        if len(values) != dim + 1:
+            skipped += 1
+            continue
+        vectors[row] = np.asarray(values[1:], dtype=np.float32)
+        words[row] = values[0].encode("utf-8")
+        row += 1
+    vectors.flush()
+    del vectors
+
+    # Sorted vocabulary, first occurrence kept for repeated words
+    order = np.argsort(words, kind="stable")
+    sorted_words = words[order]
+    unique = np.ones(len(order), dtype=bool)
+    unique[1:] = sorted_words[1:] != sorted_words[:-1]
+    np.save(words_file, sorted_words[unique])
+    np.save(rows_file, order[unique].astype(np.int32))
+
+    logger.info(f"ok, {np.count_nonzero(unique)} words, {count - np.count_nonzero(unique)} repeated, "
+                f"{skipped} malformed lines skipped")
+
+
+def configure_logger():
+    """
+    Method to configure logging
+    """
+    logargs = {
+        'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        'datefmt': '%Y-%m-%d %H:%M:%S'}
+
+    logargs["level"] = LOG_LEVEL
+
+    logging.basicConfig(**logargs)
+
+    return logging.getLogger("Embeddings converter")
+
+
+def main():
+    """ Main function """
+
+    # Configure logger
+    logger = configure_logger()
+
+    # Configure arguments
+    parser = argparse.ArgumentParser(description="Convert a text embeddings file to a memory mapped binary store")
+    parser.add_argument('text_file',
+                        help="Text embeddings file, as data/SBW-vectors-300-min5.txt.")
+    parser.add_argument('--prefix',
+                        help="Store files path without suffix. Text file path without extension by default.")
+
+    args = parser.parse_args()
+
+    convert(args.text_file, args.prefix or path.splitext(args.text_file)[0], logger)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+# encoding:utf-8
+"""
+File that exports the rain question CNN to a NumPy archive, for NumpyPredict
+"""
+
+import argparse
+import dill
+import logging
+import time
+import numpy as np
+import pandas as pd
+from keras.models import load_model
+from predict import Predict
+from numpy_predict import NumpyPredict
+
+# Setting application logging level
+LOG_LEVEL = "INFO"
+
+# Layers of the network, Dropout excluded as it is identity at inference
+ARCHITECTURE = ["Embedding", "Conv1D", "MaxPooling1D", "Conv1D", "GlobalMaxPooling1D", "Dense", "Dense"]
+
+# Max absolute difference allowed against Keras predictions
+TOLERANCE = 1e-4
+
+
+class ExportException(Exception):
+    """ Custom exception to handler a model that cannot be exported """
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}"
+
+
+def configure_logger():
+    """
+    Method to configure logging
+    """
+    logargs = {
+        'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        'datefmt': '%Y-%m-%d %H:%M:%S'}
+
+    logargs["level"] = LOG_LEVEL
+
+    logging.basicConfig(**logargs)
+
+    return logging.getLogger("Export NumPy")
+
+
+def _conv1d(layer, name):
+    """
+    Function to get the weights of a Conv1D layer
+    """
+    config = layer.get_config()
+    if config["padding"] != "valid" or tuple(config["strides"]) != (1,) or tuple(config["dilation_rate"]) != (1,):
+        raise ExportException(f"Layer {layer.name}: only valid padding, strides 1 and dilation 1 are supported")
+
+    kernel, bias = layer.get_weights()
+    return {f"{name}_kernel": kernel, f"{name}_bias": bias, f"{name}_activation": config["activation"]}
+
+
+def _dense(layer, name):
+    """
+    Function to get the weights of a Dense layer
+    """
+    kernel, bias = layer.get_weights()
+    return {f"{name}_kernel": kernel, f"{name}_bias": bias, f"{name}_activation": layer.get_config()["activation"]}
+
+
+def export_model(model, tokenizer, archive_file, max_text_lenght=100):
+    """
+    Function to save the weights of model and the tokenizer configuration in a npz archive
+    @model: Keras model built by Train
+    @tokenizer: Keras tokenizer fitted by Train
+    """
+    layers = [layer for layer in model.layers if layer.__class__.__name__ != "Dropout"]
+    if [layer.__class__.__name__ for layer in layers] != ARCHITECTURE:
+        raise ExportException(f"Unsupported architecture: {[layer.__class__.__name__ for layer in layers]}")
+    if tokenizer.char_level:
+        raise ExportException("Char level tokenizers are not supported")
+
+    embedding, conv1, pooling, conv2, _, dense1, dense2 = layers
+    pooling_config = pooling.get_config()
+    if pooling_config["padding"] != "valid":
+        raise ExportException(f"Layer {pooling.name}: only valid padding is supported")
+
+    arrays = {"embedding": embedding.get_weights()[0],
+              "pool_size": pooling_config["pool_size"][0],
+              "pool_strides": pooling_config["strides"][0],
+              "max_text_lenght": max_text_lenght}
+    arrays.update(_conv1d(conv1, "conv1"))
+    arrays.update(_conv1d(conv2, "conv2"))
+    arrays.update(_dense(dense1, "dense1"))
+    arrays.update(_dense(dense2, "dense2"))
+
+    # Tokenizer configuration, vocabulary as words and indexes arrays
+    arrays.update({"words": np.array(list(tokenizer.word_index.keys())),
+                   "indices": np.array(list(tokenizer.word_index.values()), dtype=np.int32),
+                   "num_words": tokenizer.num_words or 0,
+                   "filters": tokenizer.filters,
+                   "lower": tokenizer.lower,
+                   "split": tokenizer.split,
+                   "oov_token": tokenizer.oov_token or ""})
+
+    np.savez_compressed(archive_file, **arrays)
+
+
+def verify(model_file, tokenizer_file, archive_file, values):
+    """
+    Function to compare NumpyPredict against Predict predictions
+    @Return max absolute difference
+    """
+    expected = Predict(model_file, tokenizer_file).predict(values)
+    predicted = NumpyPredict(archive_file).predict(values)
+
+    return float(np.max(np.abs(expected - predicted)))
+
+
+def main():
+    """ Main function """
+
+    # Configure logger
+    logger = configure_logger()
+
+    # Configure arguments
+    parser = argparse.ArgumentParser(description="Export the rain question model to a NumPy archive")
+    parser.add_argument('--model_file', default="models/model_weather_rain.mdl",
+                        help="Keras model file.")
+    parser.add_argument('--tokenizer_file', default="models/tokenizer_weather_rain.mdl",
+                        help="Tokenizer file.")
+    parser.add_argument('--archive_file', default="models/model_weather_rain.npz",
+                        help="NumPy archive file to write.")
+    parser.add_argument('--samples_file', default="data/train.csv",
+                        help="CSV file with the comments used to verify the archive.")
+
+    args = parser.parse_args()
+
+    logger.info(f"Exporting {args.model_file} to {args.archive_file} ...")
+    export_model(load_model(args.model_file, compile=False),
+                 dill.load(open(args.tokenizer_file, 'rb')), args.archive_file)
+    logger.info("ok")
+
+    # Samples, plus empty, unknown words and over max lenght texts
+    values = pd.read_csv(args.samples_file, sep=';').fillna(' ')["comment_text"].tolist()
+    values += ["", "palabras desconocidas xyzzy", " ".join(values)]
+
+    difference = verify(args.model_file, args.tokenizer_file, args.archive_file, values)
+    logger.info(f"Max absolute difference against Keras on {len(values)} texts: {difference:.2e}")
+    if difference > TOLERANCE:
+        raise ExportException(f"Archive predictions differ from Keras by {difference:.2e}")
+
+    start = time.perf_counter()
+    predictor = NumpyPredict(args.archive_file)
+    predictor.load()
+    predictor.warmup()
+    logger.info(f"NumPy model loaded and warmed up in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/python3
+# encoding:utf-8
+"""
+File that contains the TensorFlow free prediction class
+"""
+
+import logging
+import numpy as np
+
+
+def _linear(x):
+    """ Identity activation """
+    return x
+
+
+def _relu(x):
+    """ Rectified linear activation """
+    return np.maximum(x, 0, out=x)
+
+
+def _sigmoid(x):
+    """ Logistic activation """
+    # exp overflows to inf for large negative inputs, giving the 0 limit
+    with np.errstate(over="ignore"):
+        return 1 / (1 + np.exp(-x))
+
+
+# Keras activations supported by the forward pass
+_ACTIVATIONS = {"linear": _linear, "relu": _relu, "sigmoid": _sigmoid}
+
+
+class NumpyPredict():
+    """
+    Class that predicts with the rain question CNN exported by export_numpy.
+    Tokenizer, padding and forward pass reproduce the Keras ones with NumPy
+    only, so neither TensorFlow nor the pickled tokenizer are loaded.
+    Interface matches Predict load, warmup and predict.
+    """
+
+    def __init__(self, archive_file) -> None:
+        """
+        Default constructor
+        @archive_file: npz file written by export_numpy
+        """
+        # Create logger instance
+        self._logger = logging.getLogger("NumpyPredict")
+
+        # Set archive file
+        self._archive_file = archive_file
+
+        # Layer weights and tokenizer, loaded once by load
+        self._weights = None
+        self._word_index = None
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, archive: {self._archive_file}"
+
+    @property
+    def loaded(self):
+        """
+        Return loaded
+        """
+        return self._weights is not None
+
+    def load(self):
+        """
+        Method to load weights and tokenizer once, to predict many times
+        """
+        if self.loaded:
+            return
+
+        self._logger.info(f"Loading {self._archive_file} ...")
+        with np.load(self._archive_file) as archive:
+            weights = {name: archive[name] for name in archive.files}
+
+        # Tokenizer configuration
+        self._word_index = dict(zip(weights.pop("words").tolist(), weights.pop("indices").tolist()))
+        self._num_words = int(weights.pop("num_words"))
+        self._lower = bool(weights.pop("lower"))
+        self._split = str(weights.pop("split"))
+        self._translate = str.maketrans({char: self._split for char in str(weights.pop("filters"))})
+        oov_token = str(weights.pop("oov_token"))
+        self._oov_index = self._word_index.get(oov_token) if oov_token else None
+
+        # Architecture parameters
+        self._max_text_lenght = int(weights.pop("max_text_lenght"))
+        self._pool_size = int(weights.pop("pool_size"))
+        self._pool_strides = int(weights.pop("pool_strides"))
+        self._activations = {layer: _ACTIVATIONS[str(weights.pop(f"{layer}_activation"))]
+                             for layer in ("conv1", "conv2", "dense1", "dense2")}
+
+        self._weights = weights
+        self._logger.info("ok")
+
+    def warmup(self):
+        """
+        Method to run a dummy inference, so the first request does not pay lazy allocations
+        """
+        self.predict([""])
+
+    def _texts_to_sequences(self, values):
+        """
+        Method to map texts to vocabulary indexes as Keras Tokenizer.texts_to_sequences
+        """
+        sequences = []
+        for value in values:
+            if self._lower:
+                value = value.lower()
+            sequence = []
+            for word in value.translate(self._translate).split(self._split):
+                if not word:
+                    continue
+                # Unknown words and words out of num_words are the oov token, if any
+                index = self._word_index.get(word, self._oov_index)
+                if index is not None and self._num_words and index >= self._num_words:
+                    index = self._oov_index
+                if index is not None:
+                    sequence.append(index)
+            sequences.append(sequence)
+
+        return sequences
+
+    def _pad_sequences(self, sequences):
+        """
+        Method to pad and truncate sequences at the beginning as Keras pad_sequences
+        """
+        padded = np.zeros((len(sequences), self._max_text_lenght), dtype=np.int32)
+        for row, sequence in enumerate(sequences):
+            sequence = sequence[-self._max_text_lenght:]
+            if sequence:
+                padded[row, -len(sequence):] = sequence
+
+        return padded
+
+    def _conv1d(self, x, layer):
+        """
+        Method to apply a valid 1D convolution as one matrix product
+        @x: batch of sequences, shape (samples, steps, channels)
+        """
+        kernel = self._weights[f"{layer}_kernel"]
+        width, channels, filters = kernel.shape
+        steps = x.shape[1] - width + 1
+
+        # Windows of width steps, concatenated in kernel order
+        windows = np.concatenate([x[:, offset:offset + steps] for offset in range(width)], axis=2)
+        output = windows @ kernel.reshape(width * channels, filters)
+        output += self._weights[f"{layer}_bias"]
+
+        return self._activations[layer](output)
+
+    def _max_pooling1d(self, x):
+        """
+        Method to apply a valid 1D max pooling
+        """
+        steps = (x.shape[1] - self._pool_size) // self._pool_strides + 1
+        if self._pool_size == self._pool_strides:
+            return x[:, :steps * self._pool_size].reshape(
+                x.shape[0], steps, self._pool_size, x.shape[2]).max(axis=2)
+
+        return np.stack([x[:, step * self._pool_strides:step * self._pool_strides + self._pool_size].max(axis=1)
+                         for step in range(steps)], axis=1)
+
+    def _dense(self, x, layer):
+        """
+        Method to apply a dense layer
+        """
+        return self._activations[layer](x @ self._weights[f"{layer}_kernel"] + self._weights[f"{layer}_bias"])
+
+    def forward(self, x):
+        """
+        Method to run the network on padded sequences. Dropout is identity at inference.
+        @x: padded sequences, shape (samples, max_text_lenght)
+        @return predictions, shape (samples, 1)
+        """
+        x = self._weights["embedding"][x]
+        x = self._conv1d(x, "conv1")
+        x = self._max_pooling1d(x)
+        x = self._conv1d(x, "conv2")
+        x = x.max(axis=1)
+        x = self._dense(x, "dense1")
+
+        return self._dense(x, "dense2")
+
+    def predict(self, values):
+        """
+        Method to predict values with the loaded weights
+        @values: list of strings
+        @return predictions
+        """
+        self.load()
+
+        return self.forward(self._pad_sequences(self._texts_to_sequences(values)))
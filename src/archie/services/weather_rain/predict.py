@@ -42,6 +42,10 @@ class Predict():
         self._batch_size = 32
         self._verbose = 1
 
+        # Model and tokenizer, loaded once by load
+        self._model = None
+        self._x_tokenizer = None
+
         # Load values
         if len(value) > 0:
             self._sample = value
@@ -82,13 +86,13 @@ class Predict():
 
         return x_test
 
-    def _tokenize_data(self, x_tokenizer):
+    def _tokenize_data(self, x_tokenizer, sample=None):
         """
         Method to create tokenizer
         """
         self._logger.info("Tokenizing data ...")
         # Tokenize with our pretrained tokenizer to get texts with same lenght
-        x_test_tokenized = x_tokenizer.texts_to_sequences(self._sample)
+        x_test_tokenized = x_tokenizer.texts_to_sequences(self._sample if sample is None else sample)
 
         # Pad the text to have sequences at max lenght of max_test_lenght (400)
         x_testing = sequence.pad_sequences(
@@ -97,23 +101,57 @@ class Predict():
 
         return x_testing
 
+    @property
+    def loaded(self):
+        """
+        Return loaded
+        """
+        return self._model is not None
+
+    def load(self):
+        """
+        Method to load model and tokenizer once, to predict many times
+        """
+        if self.loaded:
+            return
+
+        self._x_tokenizer = self._load_tokenizer(self._tokenizer_file)
+        self._model = self._load_model(self._model_file)
+
+    def warmup(self):
+        """
+        Method to run a dummy inference, so the first request does not pay graph building
+        """
+        self.predict([""])
+
+    def predict(self, values):
+        """
+        Method to predict values with the loaded model
+        @values: list of strings
+        @return predictions
+        """
+        self.load()
+
+        # Tokenize data
+        x_testing = self._tokenize_data(self._x_tokenizer, values)
+
+        # Single batch call, without the input pipeline built by model.predict
+        return self._model.predict_on_batch(x_testing)
+
     def run(self):
         """
         Method to run prediction
         @return predictions
         """
-        # Load model
-        model = self._load_model(self._model_file)
-
-        # Load tokenizer
-        x_tokenizer = self._load_tokenizer(self._tokenizer_file)
+        # Load model and tokenizer
+        self.load()
 
         # Tokenize data
-        x_testing = self._tokenize_data(x_tokenizer)
+        x_testing = self._tokenize_data(self._x_tokenizer)
 
         self._logger.info("Running prediction ...")
         # To predict if our comments are toxic or not
-        y_testing = model.predict(
+        y_testing = self._model.predict(
             x_testing, verbose=self._verbose, batch_size=self._batch_size)
         self._logger.info("ok")
 
@@ -4,19 +4,96 @@
 File that servers weather service
 """
 import logging
+import threading
 import uvicorn
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from os import path
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from predict import Predict
+from pydantic import BaseModel
+from typing import List
+from batcher import MicroBatcher, MicroBatcherStoppedException
 from urllib import parse
 
 # Configure logger instance
 logger = logging.getLogger("WeatherService")
 
+# NumPy archive exported by export_numpy
+numpy_model_file = path.join(path.dirname(__file__), "models", "model_weather_rain.npz")
+
+# Resident predictor, shared by every request.
+# The exported archive is preferred, so TensorFlow is not imported at all
+if path.exists(numpy_model_file):
+    from numpy_predict import NumpyPredict
+    predictor = NumpyPredict(numpy_model_file)
+else:
+    from predict import Predict
+    predictor = Predict(path.join(path.dirname(__file__), "models", "model_weather_rain.mdl"),
+                        path.join(path.dirname(__file__), "models", "tokenizer_weather_rain.mdl"),
+                        "comment_text")
+
+# Set when model is loaded and warmed up
+ready = threading.Event()
+
+# Single thread for inference, out of the event loop
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="WeatherInference")
+
+# Batching parameters, set from arguments by main
+batching = {"max_batch_size": 32, "max_wait_ms": 5}
+
+# Coalescer of concurrent queries into batched inferences, created on startup
+batcher = None
+
+
+def _load_predictor():
+    '''
+    Function to load and warm up the model once
+    '''
+    try:
+        predictor.load()
+        predictor.warmup()
+        ready.set()
+        logger.info("Model ready")
+    except Exception as e:
+        logger.error(f"Unable to load model: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    '''
+    Function to load the model in background on startup, so readiness can be probed meanwhile
+    '''
+    global batcher
+    executor.submit(_load_predictor)
+    batcher = MicroBatcher(predictor.predict, executor, **batching)
+    batcher.start()
+    yield
+    await batcher.stop()
+    executor.shutdown()
+
+
+class QueriesBatch(BaseModel):
+    '''
+    Batch of queries to predict
+    '''
+    queries: List[str]
+
+
+def _prediction(query, prediction):
+    '''
+    Function to build the response of one query
+    '''
+    status = False if prediction[0] < .5 else True
+    logger.info(f"Comment <{query}> is {status} - Prediction: {prediction[0] * 100:.2f}")
+
+    return {"prediction": f"{status}", "Accuracy": f"{prediction[0] * 100:.2f}"}
+
+
 # Create FastAPI instance
-weather = FastAPI()
+weather = FastAPI(lifespan=lifespan)
 
 # Allowed origins
 origins = [
@@ -36,6 +113,18 @@ weather.add_middleware(
 )
 
 
+@weather.get("/ready")
+async def readiness():
+    '''
+    Function to check if the model is loaded
+    @returns: json string, status 503 until ready
+    '''
+    if not ready.is_set():
+        return JSONResponse({"ready": "False"}, status_code=503)
+
+    return {"ready": "True"}
+
+
 @weather.get("/predict/{query}")
 async def predict(query: str):
     '''
@@ -43,19 +132,37 @@ async def predict(query: str):
     @returns: json string
     '''
     logger.info(f'Query received: {query}')
-    predictor = Predict(path.join(path.dirname(__file__), "models", "model_weather_rain.mdl"), 
-                        path.join(path.dirname(__file__), "models", "tokenizer_weather_rain.mdl"),
-                        "comment_text", value=[parse.unquote_plus(query)])
-    # Launch prediction
-    predictions = predictor.run()
 
-    # Printing shape
-    logger.info(
-        f"Shape: {predictions.shape} - Prediction: {predictions[0][0] * 100:.2f}")
-    status = False if predictions[0][0] < .5 else True
-    logger.info(f"Comment <{query}> is {status}")
+    if not ready.is_set():
+        return JSONResponse({"prediction": "False", "error": "Model not ready"}, status_code=503)
 
-    return {"prediction": f"{status}", "Accuracy": f"{predictions[0][0] * 100:.2f}"}
+    # Launch prediction, batched with concurrent queries
+    try:
+        prediction = await batcher.predict(parse.unquote_plus(query))
+    except MicroBatcherStoppedException:
+        return JSONResponse({"prediction": "False", "error": "Service stopping"}, status_code=503)
+
+    return _prediction(query, prediction)
+
+
+@weather.post("/predict/batch")
+async def predict_batch(batch: QueriesBatch):
+    '''
+    Function to predict if many queries are rain questions
+    @returns: json string
+    '''
+    logger.info(f'{len(batch.queries)} queries received')
+
+    if not ready.is_set():
+        return JSONResponse({"predictions": [], "error": "Model not ready"}, status_code=503)
+
+    try:
+        predictions = await batcher.predict_many(batch.queries)
+    except MicroBatcherStoppedException:
+        return JSONResponse({"predictions": [], "error": "Service stopping"}, status_code=503)
+
+    return {"predictions": [_prediction(query, prediction)
+                            for query, prediction in zip(batch.queries, predictions)]}
 
 
 def main():
@@ -70,12 +177,21 @@ def main():
     parser.add_argument('--port',
                         help="Port where running the service.",
                         type=int)
+    parser.add_argument('--max_batch_size',
+                        default=batching["max_batch_size"], type=int,
+                        help="Max queries predicted in one inference.")
+    parser.add_argument('--max_wait_ms',
+                        default=batching["max_wait_ms"], type=float,
+                        help="Max milliseconds a query waits for others to fill a batch.")
 
     args = parser.parse_args()
     logger.debug(f"Arguments: {args.host}:{args.port}")
 
+    # Set batching parameters
+    batching.update(max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+
     # Launch service
-    uvicorn.run("service:weather", host=args.host, port=args.port)
+    uvicorn.run(weather, host=args.host, port=args.port)
 
 
 if __name__ == "__main__":
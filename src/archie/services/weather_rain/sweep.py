@@ -0,0 +1,162 @@
+#!/usr/bin/python3
+# encoding:utf-8
+"""
+File that runs hyperparameter sweeps of the rain question CNN
+"""
+
+import argparse
+import csv
+import itertools
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+# Setting application logging level
+LOG_LEVEL = "INFO"
+
+# Hyperparameters swept
+HYPERPARAMETERS = ["filters", "kernel_size", "hidden_dims", "batch_size", "epochs"]
+
+# Results table columns
+COLUMNS = HYPERPARAMETERS + ["val_accuracy", "train_seconds", "latency_ms", "parameters"]
+
+# Inference calls timed per configuration
+LATENCY_RUNS = 100
+
+
+def configure_logger():
+    """
+    Method to configure logging
+    """
+    logargs = {
+        'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        'datefmt': '%Y-%m-%d %H:%M:%S'}
+
+    logargs["level"] = LOG_LEVEL
+
+    logging.basicConfig(**logargs)
+
+    return logging.getLogger("Sweep")
+
+
+def train_configuration(args, configuration, threads):
+    """
+    Function to train and time one configuration, run in a pool process
+    @configuration: dict of hyperparameters
+    @threads: TensorFlow threads of the process, so concurrent trainings do not oversubscribe cores
+    @return results row
+    """
+    configure_logger()
+
+    # Imported in pool processes only, the sweep process does not load TensorFlow
+    import tensorflow as tf
+    from trainning import Train
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(threads)
+
+    train = Train(args.samples_file, "comment_text", "rain", args.embeddings_file, args.embeddings_dim,
+                  csv_sep=';', pipeline=True, **configuration)
+
+    start = time.perf_counter()
+    history = train.run()
+    train_seconds = time.perf_counter() - start
+
+    # Latency of one query, as served
+    sample = np.zeros((1, train.max_text_lenght), dtype=np.int32)
+    train.model.predict_on_batch(sample)
+    latencies = []
+    for _ in range(LATENCY_RUNS):
+        start = time.perf_counter()
+        train.model.predict_on_batch(sample)
+        latencies.append(time.perf_counter() - start)
+
+    if args.models_path:
+        name = "_".join(str(configuration[hyperparameter]) for hyperparameter in HYPERPARAMETERS)
+        train.save_model(os.path.join(args.models_path, f"model_weather_rain_{name}.mdl"))
+        train.save_tokenizer(os.path.join(args.models_path, f"tokenizer_weather_rain_{name}.mdl"))
+
+    return dict(configuration,
+                val_accuracy=float(history.history["val_accuracy"][-1]),
+                train_seconds=train_seconds,
+                latency_ms=float(np.percentile(latencies, 50) * 1000),
+                parameters=train.model.count_params())
+
+
+def main():
+    """ Main function """
+
+    # Configure logger
+    logger = configure_logger()
+
+    # Configure arguments
+    parser = argparse.ArgumentParser(description="Train hyperparameter configurations concurrently")
+    parser.add_argument('--samples_file', default="data/train.csv",
+                        help="CSV file with the samples to train.")
+    parser.add_argument('--embeddings_file', default="data/SBW-vectors-300-min5.txt",
+                        help="Embeddings file.")
+    parser.add_argument('--embeddings_dim', default=300, type=int,
+                        help="Embeddings dimension.")
+    parser.add_argument('--filters', default=[250], type=int, nargs='+',
+                        help="Convolution filters to sweep.")
+    parser.add_argument('--kernel_size', default=[3], type=int, nargs='+',
+                        help="Convolution kernel sizes to sweep.")
+    parser.add_argument('--hidden_dims', default=[150], type=int, nargs='+',
+                        help="Hidden dims to sweep.")
+    parser.add_argument('--batch_size', default=[10], type=int, nargs='+',
+                        help="Batch sizes to sweep.")
+    parser.add_argument('--epochs', default=[5], type=int, nargs='+',
+                        help="Epochs to sweep.")
+    parser.add_argument('-w', '--workers', default=max(1, os.cpu_count() // 2), type=int,
+                        help="Configurations trained concurrently.")
+    parser.add_argument('--results_file', default="models/sweep_results.csv",
+                        help="CSV file where results table is written.")
+    parser.add_argument('--models_path',
+                        help="Folder where models of every configuration are saved. Not saved by default.")
+    parser.add_argument('--min_accuracy', default=0.9, type=float,
+                        help="Validation accuracy bar of the selected model.")
+
+    args = parser.parse_args()
+
+    configurations = [dict(zip(HYPERPARAMETERS, values)) for values in itertools.product(
+        *(getattr(args, hyperparameter) for hyperparameter in HYPERPARAMETERS))]
+    workers = min(args.workers, len(configurations))
+    threads = max(1, os.cpu_count() // workers)
+    logger.info(f"Sweeping {len(configurations)} configurations on {workers} processes, {threads} threads each")
+
+    # TensorFlow is not fork safe, pool processes are spawned
+    results = []
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {executor.submit(train_configuration, args, configuration, threads): configuration
+                   for configuration in configurations}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+                logger.info(f"Finished {results[-1]}")
+            except Exception as e:
+                logger.error(f"Configuration {futures[future]} failed: {e}")
+
+    # Results table, fastest first
+    results.sort(key=lambda result: result["latency_ms"])
+    with open(args.results_file, "w", newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
+
+    logger.info(" | ".join(f"{column:>13}" for column in COLUMNS))
+    for result in results:
+        logger.info(" | ".join(f"{result[column]:>13.4g}" for column in COLUMNS))
+    logger.info(f"Results written to {args.results_file}")
+
+    selected = [result for result in results if result["val_accuracy"] >= args.min_accuracy]
+    if selected:
+        logger.info(f"Fastest model with validation accuracy >= {args.min_accuracy}: {selected[0]}")
+    else:
+        logger.info(f"No model reached validation accuracy {args.min_accuracy}")
+
+
+if __name__ == "__main__":
+    main()
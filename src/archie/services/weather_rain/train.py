@@ -77,6 +77,9 @@ def train_for_rain_question():
     # Save tokenizer to use it later for prediction
     train.save_tokenizer("models/tokenizer_weather_rain.mdl")
 
+    # Export weights and tokenizer to the NumPy archive used by the service
+    train.save_numpy("models/model_weather_rain.npz")
+
     plot_history(history)
 
 def check_for_rain_question(logger):
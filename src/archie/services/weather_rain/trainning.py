@@ -4,6 +4,7 @@
 File that contains trainning test in a convolutional neural network
 """
 
+import csv
 import dill
 import logging
 import numpy as np
@@ -14,7 +15,10 @@ from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Dense, Dropout
 from tensorflow.keras.layers import Embedding
 from tensorflow.keras.layers import Conv1D, GlobalMaxPooling1D, MaxPooling1D
+from os import path
 from sklearn.model_selection import train_test_split
+from embeddings import Embeddings
+from export_numpy import export_model
 
 
 class Train():
@@ -23,9 +27,11 @@ class Train():
     """
 
     def __init__(self, samples_file, text_to_train_header, values_to_train_header,
-                 embeddings_file, embeddings_dim, csv_sep=',') -> None:
+                 embeddings_file, embeddings_dim, csv_sep=',', filters=250, kernel_size=3,
+                 hidden_dims=150, batch_size=10, epochs=5, pipeline=False) -> None:
         """
         Default constructor
+        @pipeline: stream the samples file through a tf.data pipeline instead of loading it in memory
         """
         # Create logger instance
         self._logger = logging.getLogger("Train")
@@ -43,27 +49,53 @@ class Train():
         # Hyperparameters optimization
         self._max_features = 20000  # max words to keep from dataset
         self._max_text_lenght = 100  # max lenght for piece of text
-        self._filters = 250  # Max number of output channels in convolution layer (Original 250)
-        self._kernel_size = 3 # Filter with or lenght. One number because is a one dim convolution (Original 3)
-        self._hidden_dims = 150  # Hidden dims for layers (Original 250)
-        self._batch_size = 10  # Number of examples to training at one time (original 32)
-        self._epochs = 5  # How many times we pass over the trained data (Original 3)
+        self._filters = filters  # Max number of output channels in convolution layer (Original 250)
+        self._kernel_size = kernel_size # Filter with or lenght. One number because is a one dim convolution (Original 3)
+        self._hidden_dims = hidden_dims  # Hidden dims for layers (Original 250)
+        self._batch_size = batch_size  # Number of examples to training at one time (original 32)
+        self._epochs = epochs  # How many times we pass over the trained data (Original 3)
         self._embedding_dim = embeddings_dim
 
+        # Input pipeline
+        self._pipeline = pipeline
+        self._validation_split = 0.15  # Share of samples for validation
+        self._shuffle_buffer = 10000  # Samples shuffled together by the pipeline
+
+        # Trained model, set by run
+        self._model = None
+
     def __repr__(self) -> str:
         """ Return a printed version """
         return f"{self.__class__.__name__}"
 
+    @property
+    def model(self):
+        """
+        Return model
+        """
+        return self._model
+
+    @property
+    def max_text_lenght(self):
+        """
+        Return max_text_lenght
+        """
+        return self._max_text_lenght
+
     def run(self):
         """
         Method to launch training
         """
 
-        # Load samples into a data frame
-        self._load_samples()
+        if self._pipeline:
+            # Create tokenizer and input pipelines streaming the samples file
+            train_dataset, validation_dataset = self._create_datasets()
+        else:
+            # Load samples into a data frame
+            self._load_samples()
 
-        # Create tokenizer and padding data
-        x_values_train = self._tokenize_data()
+            # Create tokenizer and padding data
+            x_values_train = self._tokenize_data()
 
         # Load embeddings
         embeddings_index = self._prepare_embeddings()
@@ -78,8 +110,12 @@ class Train():
         model = self._compile_model(model)
 
         # Train model
-        model = self._train_model(
-            model, x_values_train, self._y_values, self._batch_size, self._epochs)
+        if self._pipeline:
+            model = self._train_model_on_datasets(
+                model, train_dataset, validation_dataset, self._epochs)
+        else:
+            model = self._train_model(
+                model, x_values_train, self._y_values, self._batch_size, self._epochs)
 
         # Saving model as a class var
         self._model = model
@@ -131,38 +167,156 @@ class Train():
 
         return x_values_train
 
-    def _prepare_embeddings(self):
+    def _read_texts(self):
         """
-        Method to load embeddings
+        Method to read the texts of the samples file one by one
         """
-        self._logger.info("Preparing embeddings ...")
-        embeddings_index = dict()
-        f = open(self._embeddings_file)
+        with open(self._samples_file, encoding="utf-8-sig", newline='') as f:
+            for row in csv.DictReader(f, delimiter=self._csv_sep):
+                yield row[self._text_to_train_header] or ' '
+
+    def _tokenize_batch(self, texts):
+        """
+        Method to tokenize and pad a batch of texts in the input pipeline
+        """
+        x_tokenized = self._x_tokenizer.texts_to_sequences([value.decode("utf-8") for value in texts])
 
-        for line in f:
-            values = line.split()
-            word = values[0]
-            coefs = np.asarray(values[1:], dtype='float32')
-            embeddings_index[word] = coefs  # map embeddings dict
+        return sequence.pad_sequences(x_tokenized, maxlen=self._max_text_lenght).astype(np.int32)
 
-        f.close()
+    def _create_datasets(self):
+        """
+        Method to create tokenizer and the training and validation input pipelines.
+        Samples are read from the CSV file, shuffled, batched, then tokenized
+        by parallel calls and prefetched while the model trains.
+        """
+        self._logger.info("Creating input pipelines ...")
+        # Create a tokenizer, fitted streaming the texts
+        self._x_tokenizer = text.Tokenizer(self._max_features)
+        self._x_tokenizer.fit_on_texts(self._read_texts())
+        self._max_features = len(self._x_tokenizer.word_index) + 1
+
+        # Columns to read, in file order as CsvDataset requires
+        with open(self._samples_file, encoding="utf-8-sig", newline='') as f:
+            header = next(csv.reader(f, delimiter=self._csv_sep))
+        text_column = header.index(self._text_to_train_header)
+        values_column = header.index(self._values_to_train_header)
+        defaults = {text_column: tf.constant(' '), values_column: tf.float32}
+
+        samples = tf.data.experimental.CsvDataset(self._samples_file, [defaults[column] for column in sorted(defaults)],
+                                                  header=True, field_delim=self._csv_sep,
+                                                  select_cols=sorted(defaults))
+        if text_column > values_column:
+            samples = samples.map(lambda values, texts: (texts, values))
+
+        # Same validation share as train_test_split, taken from every 100 samples
+        validation_share = int(self._validation_split * 100)
+        samples = samples.enumerate()
+        train_samples = samples.filter(lambda index, _: index % 100 >= validation_share)
+        validation_samples = samples.filter(lambda index, _: index % 100 < validation_share)
+
+        def tokenize(texts, values):
+            x_values = tf.numpy_function(self._tokenize_batch, [texts], tf.int32)
+            x_values.set_shape([None, self._max_text_lenght])
+            return x_values, values
+
+        def pipeline(dataset, shuffle):
+            dataset = dataset.map(lambda _, sample: sample)
+            if shuffle:
+                dataset = dataset.shuffle(self._shuffle_buffer)
+
+            return dataset.batch(self._batch_size).map(
+                tokenize, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+
+        self._logger.info("ok")
+
+        return pipeline(train_samples, True), pipeline(validation_samples, False)
+
+    def _prepare_embeddings(self):
+        """
+        Method to load embeddings.
+        The binary store written by embeddings.py is memory mapped when it exists
+        next to the text file, otherwise the text file is streamed by
+        _create_embedding_matrix
+        @return embeddings store or None
+        """
+        self._logger.info("Preparing embeddings ...")
+        store_prefix = path.splitext(self._embeddings_file)[0]
+        if not Embeddings.exists(store_prefix):
+            self._logger.info(f"No binary store {store_prefix}, text file will be streamed. "
+                              "Run embeddings.py to convert it")
+            return None
+
+        embeddings_index = Embeddings(store_prefix)
+        embeddings_index.load()
         self._logger.info("ok")
-        self._logger.debug(f"Found {len(embeddings_index)} word vectors.")
+        self._logger.debug(f"Mapped {len(embeddings_index)} word vectors.")
 
         return embeddings_index
 
+    def _vocabulary(self):
+        """
+        Method to get the tokenizer words with a row in the embedding matrix
+        @return dict of word and row
+        """
+        return {word: index for word, index in self._x_tokenizer.word_index.items()
+                if index <= self._max_features - 1}
+
+    def _gather_embeddings(self, embeddings_index, embedding_matrix, vocabulary):
+        """
+        Method to fill the embedding matrix rows by index lookup in the store
+        @return number of words found
+        """
+        words = list(vocabulary)
+        indexes = np.array([vocabulary[word] for word in words], dtype=np.int64)
+        rows = embeddings_index.lookup(words)
+        found = rows >= 0
+        # Rows read in file order
+        order = np.argsort(rows[found])
+        embedding_matrix[indexes[found][order]] = embeddings_index.vectors[rows[found][order]]
+
+        return int(np.count_nonzero(found))
+
+    def _stream_embeddings(self, embedding_matrix, vocabulary):
+        """
+        Method to fill the embedding matrix rows in one pass over the text file.
+        Only the values of vocabulary words are parsed, other lines are skipped
+        after reading their word.
+        @return number of words found
+        """
+        missing = dict(vocabulary)
+        with open(self._embeddings_file, encoding="utf-8") as f:
+            for line in f:
+                if not missing:
+                    break
+                values = line.split(maxsplit=1)
+                if len(values) < 2 or values[0] not in missing:
+                    continue
+                coefs = np.asarray(values[1].split(), dtype='float32')
+                # word2vec header and malformed lines
+                if len(coefs) != self._embedding_dim:
+                    continue
+                # First occurrence of repeated words is kept
+                embedding_matrix[missing.pop(values[0])] = coefs
+
+        return len(vocabulary) - len(missing)
+
     def _create_embedding_matrix(self, embeddings_index):
         """
-        Method to create the embedding matrix
+        Method to create the embedding matrix.
+        Only the vocabulary vectors are read, so memory is vocabulary size by embeddings dimension
         """
-        embedding_matrix = np.zeros((self._max_features, self._embedding_dim))
-        for word, index in self._x_tokenizer.word_index.items():
-            if index > self._max_features - 1:
-                break
-            else:
-                embedding_vector = embeddings_index.get(word)
-                if embedding_vector is not None:
-                    embedding_matrix[index] = embedding_vector
+        self._logger.info("Creating embedding matrix ...")
+        embedding_matrix = np.zeros((self._max_features, self._embedding_dim), dtype=np.float32)
+        vocabulary = self._vocabulary()
+
+        if embeddings_index is not None:
+            hits = self._gather_embeddings(embeddings_index, embedding_matrix, vocabulary)
+        else:
+            hits = self._stream_embeddings(embedding_matrix, vocabulary)
+
+        self._logger.info("ok")
+        self._logger.info(f"Embeddings coverage: {hits} of {len(vocabulary)} words "
+                          f"({hits / max(len(vocabulary), 1) * 100:.1f}%), {len(vocabulary) - hits} missing")
 
         return embedding_matrix
 
@@ -235,6 +389,16 @@ class Train():
 
         return model
 
+    def _train_model_on_datasets(self, model, train_dataset, validation_dataset, epochs):
+        """
+        Method to train the model with the input pipelines
+        """
+        self._logger.info("Trainning model ...")
+        model.fit(train_dataset, epochs=epochs, validation_data=validation_dataset)
+        self._logger.info("ok")
+
+        return model
+
     def save_model(self, model_file):
         """
         Method to save trainned model in to a pickel file
@@ -255,3 +419,13 @@ class Train():
         # Save tokenizer
         dill.dump(self._x_tokenizer, open(tokenizer_file, 'wb'))
         self._logger.info("ok")
+
+    def save_numpy(self, archive_file):
+        """
+        Method to export trainned model and tokenizer in to a NumPy archive
+        """
+
+        self._logger.info(f"Exporting model to {archive_file} ...")
+        # Export weights and tokenizer configuration
+        export_model(self._model, self._x_tokenizer, archive_file, self._max_text_lenght)
+        self._logger.info("ok")
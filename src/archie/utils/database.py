@@ -4,98 +4,179 @@ database.py - File that contains database connection interface class
 """
 
 import sqlite3
+import threading
+from contextlib import contextmanager
 from archie.utils.decorators import trace_debug
 
+
+class DatabaseConnectionException(Exception):
+    """ Custom exception to handler an exception connecting to the database """
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}"
+
+class DatabaseQueryException(Exception):
+    """ Custom exception to handler an exception running a statement """
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}"
+
 class Database():
     """
-    Class to handler a database interface
+    Class to handler a database interface.
+    One connection is opened on first use and reused by every statement, so
+    SQLite keeps statements prepared between calls. Values are always bound
+    as parameters, never formatted into SQL.
     """
 
+    # Prepared statements kept by the connection
+    _CACHED_STATEMENTS = 256
+
     @trace_debug("Initializing database interface ...")
-    def __init__(self, database) -> None:
+    def __init__(self, database, wal=False) -> None:
         """
         Default constructor
+        @wal: use write-ahead logging, so readers do not block the writer
         """
         # Setting database path
         self._database = database
-
-    def _connect(self):
+        # Setting journal mode
+        self._wal = wal
+        self._conn = None
+        # Serialize statements and transactions on the shared connection
+        self._lock = threading.RLock()
+        # Nesting level of the running transaction
+        self._transaction_level = 0
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, database: {self._database}, wal: {self._wal}"
+
+    def _connection(self):
         """
-        Function to connect to database
-        """        
-        self._conn = sqlite3.connect(self._database)
-
-    def _disconnect(self):
+        Function to get the connection, connecting to database on first use
+        """
+        if self._conn is None:
+            try:
+                # Autocommit mode, transactions are explicit
+                self._conn = sqlite3.connect(self._database, isolation_level=None,
+                                             check_same_thread=False,
+                                             cached_statements=self._CACHED_STATEMENTS)
+                if self._wal:
+                    # Commits do not wait for a full sync in WAL mode
+                    self._conn.execute("PRAGMA journal_mode=WAL")
+                    self._conn.execute("PRAGMA synchronous=NORMAL")
+            except sqlite3.Error as e:
+                self._conn = None
+                raise DatabaseConnectionException(f"Unable to connect to {self._database}: {e}") from e
+
+        return self._conn
+
+    def close(self):
         """
-        Function to disconnect from the database
+        Function to close the connection
         """
-        if self._conn:
-            self._conn.close()
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
 
-    def select(self, table, columns, conditions=None):
+    @contextmanager
+    def transaction(self):
         """
-        Function to perform a select from the database
+        Function to run the statements of a with block in one transaction.
+        It is committed when the block ends and rolled back if it raises.
+        Nested transactions join the outer one.
         """
-        data = None
-        self._connect()
+        with self._lock:
+            conn = self._connection()
+
+            if self._transaction_level:
+                self._transaction_level += 1
+                try:
+                    yield self
+                finally:
+                    self._transaction_level -= 1
+                return
 
-        if self._conn:
-            query = f"SELECT {columns} FROM {table}"
-            if conditions:
-                query += f" WHERE {conditions}"
             try:
-                result = self._conn.execute(query)
-                data = result.fetchall()
+                conn.execute("BEGIN")
+            except sqlite3.Error as e:
+                raise DatabaseQueryException(f"Unable to begin transaction: {e}") from e
 
-            except Exception:
-                pass
+            self._transaction_level = 1
+            try:
+                yield self
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            else:
+                try:
+                    conn.execute("COMMIT")
+                except sqlite3.Error as e:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    raise DatabaseQueryException(f"Unable to commit transaction: {e}") from e
             finally:
-                self._disconnect()
-        
-        return data
+                self._transaction_level = 0
 
-    def insert(self, table, values):
+    def execute(self, query, parameters=()):
         """
-        Function to perform an insert in to the database
+        Function to run a statement
+        @Return list of result rows
         """
-        result = False
-        self._connect()
-
-        try:
-            with self._conn:
-                self._conn.execute(f"INSERT INTO {table} VALUES ({values})")
-            
-            result = True
-
-        except Exception:
-            pass
-        finally:
-            self._disconnect()
-
-        return result
+        with self._lock:
+            try:
+                return self._connection().execute(query, parameters).fetchall()
+            except sqlite3.Error as e:
+                raise DatabaseQueryException(f"Error running <{query}>: {e}") from e
 
-    def atomic_update(self, table, column, value, conditions):
+    def execute_many(self, query, parameters):
         """
-        Function to perform an update in to the database
+        Function to run a statement for every tuple of parameters in one transaction
         """
-        result = False
-        self._connect()
-
-        try:
-            with self._conn:
-                self._conn.execute(f"UPDATE {table} SET {column} = {value} WHERE {conditions})")
-            
-            result = True
-
-        except Exception:
-            pass
-        finally:
-            self._disconnect()
-
-        return result
+        with self.transaction():
+            try:
+                self._connection().executemany(query, parameters)
+            except sqlite3.Error as e:
+                raise DatabaseQueryException(f"Error running <{query}>: {e}") from e
 
-    
+    def select(self, table, columns, conditions=None, parameters=()):
+        """
+        Function to perform a select from the database
+        @conditions: where clause with ? placeholders
+        @parameters: values of the placeholders
+        @Return list of result rows
+        """
+        query = f"SELECT {columns} FROM {table}"
+        if conditions:
+            query += f" WHERE {conditions}"
 
+        return self.execute(query, parameters)
 
+    def insert(self, table, values):
+        """
+        Function to perform an insert in to the database
+        @values: tuple with the values of the row
+        """
+        self.execute(f"INSERT INTO {table} VALUES ({', '.join('?' * len(values))})", values)
 
+    def insert_many(self, table, rows):
+        """
+        Function to insert many rows in one transaction
+        @rows: list of tuples with the values of each row
+        """
+        if rows:
+            self.execute_many(f"INSERT INTO {table} VALUES ({', '.join('?' * len(rows[0]))})", rows)
 
+    def update(self, table, values, conditions, parameters=()):
+        """
+        Function to perform an update in to the database
+        @values: dict of column and new value
+        @conditions: where clause with ? placeholders
+        @parameters: values of the placeholders
+        """
+        columns = ", ".join(f"{column} = ?" for column in values)
+        self.execute(f"UPDATE {table} SET {columns} WHERE {conditions}",
+                     tuple(values.values()) + tuple(parameters))
@@ -0,0 +1,61 @@
+# encoding:utf-8
+"""
+migrate_statistics.py - File that contains code to migrate statistics databases
+to the counters schema
+"""
+
+import argparse
+import logging
+from os import path
+from archie.utils.statistics import SpeechToTextStats
+
+__authors__ = "Marco Espinosa"
+__license__ = "MIT License"
+__version__ = "1.0"
+__maintainer__ = "Marco Espinosa"
+__email__ = "hi@marcoespinosa.es"
+__status__ = "Development"
+
+# Setting application logging level
+LOG_LEVEL = "DEBUG"
+
+def configure_logger():
+    """
+    Method to configure logging
+    """
+    logargs = {
+        'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        'datefmt': '%Y-%m-%d %H:%M:%S'}
+
+    logargs["level"] = LOG_LEVEL
+
+    logging.basicConfig(**logargs)
+
+    return logging.getLogger("Migrate statistics util")
+
+
+def main():
+    """ Main fucntion """
+
+    # Configure logger
+    logger = configure_logger()
+
+    # Configure arguments
+    parser = argparse.ArgumentParser(description="Migrate a statistics database to per day and per month counters")
+    parser.add_argument('database',
+                        help="Statistics database file.")
+
+    args = parser.parse_args()
+
+    stats = SpeechToTextStats(path.dirname(args.database), path.basename(args.database))
+
+    logger.info(f"Migrating {args.database} ...")
+    if stats.migrate():
+        logger.info(f"Counters backfilled. Current month requests: {stats.get_current_month_requests()}")
+    else:
+        logger.info("Database already migrated")
+    logger.info("ok")
+
+
+if __name__ == "__main__":
+    main()
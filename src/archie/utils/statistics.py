@@ -6,7 +6,7 @@ statistics.py - File that contains database statistics interface
 from abc import ABC
 from datetime import datetime
 from os import path
-from archie.utils.database import Database
+from archie.utils.database import Database, DatabaseConnectionException, DatabaseQueryException
 
 
 class InsertingStatsInDatabaseException(Exception):
@@ -25,60 +25,148 @@ class Stats(ABC):
     """
     Main class that implement common elements for statistics
     """
-    def __init__(self, db_path, db_name) -> None:
+    # Errors raised by the database interface
+    _DATABASE_ERRORS = (DatabaseConnectionException, DatabaseQueryException)
+
+    def __init__(self, db_path, db_name, wal=False) -> None:
         """
         Default constructor
+        @wal: use write-ahead logging for concurrent readers
+        """
+        self._database = Database(path.join(db_path, db_name), wal)
+
+    def close(self):
         """
-        self._database = Database(path.join(db_path, db_name))
+        Method to close the database connection
+        """
+        self._database.close()
+
+class MigratingStatsDatabaseException(Exception):
+    """ Custom exception to handler an exception migrating the database schema """
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}"
 
 class SpeechToTextStats(Stats):
     """
-    Class that implements speech to text statistics interface
+    Class that implements speech to text statistics interface.
+    Every insert also increments per day and per month counters in the same
+    transaction, so current month requests are read from one row.
     """
     _TABLE = "speech_to_text"
+    _DAILY_TABLE = "speech_to_text_daily"
+    _MONTHLY_TABLE = "speech_to_text_monthly"
+    # Schema version stored in database user_version
+    _SCHEMA_VERSION = 1
 
-    def __init__(self, db_path, db_name) -> None:
+    def __init__(self, db_path, db_name, wal=False) -> None:
         """
         Default constructor
         """
-        # Call super init function
-        super().__init__(db_path, db_name)
+        # Call super init function
+        super().__init__(db_path, db_name, wal)
 
     def __repr__(self) -> str:
         """ Return a printed version """
         return f"{self.__class__.__name__}, database: {self._database}"
 
+    def schema_version(self):
+        """
+        Method to get the database schema version
+        """
+        try:
+            return self._database.select("pragma_user_version", "user_version")[0][0]
+        except self._DATABASE_ERRORS as e:
+            raise FetchingStatsInDatabaseException(e) from e
+
+    def migrate(self):
+        """
+        Method to create requests and counters tables and index, and backfill
+        counters from existing requests. It does nothing if the schema is up to date.
+        @Return True if the database was migrated
+        """
+        if self.schema_version() >= self._SCHEMA_VERSION:
+            return False
+
+        try:
+            with self._database.transaction() as database:
+                # Requests table is missing in a new database
+                database.execute(f"CREATE TABLE IF NOT EXISTS {self._TABLE} (datetime TEXT, day INTEGER, "
+                                 "month INTEGER, year INTEGER, query TEXT)")
+                database.execute(f"CREATE TABLE IF NOT EXISTS {self._DAILY_TABLE} (year INTEGER, month INTEGER, "
+                                 "day INTEGER, requests INTEGER, PRIMARY KEY (year, month, day))")
+                database.execute(f"CREATE TABLE IF NOT EXISTS {self._MONTHLY_TABLE} (year INTEGER, month INTEGER, "
+                                 "requests INTEGER, PRIMARY KEY (year, month))")
+                database.execute(f"CREATE INDEX IF NOT EXISTS {self._TABLE}_year_month ON {self._TABLE} (year, month)")
+                database.execute(f"DELETE FROM {self._DAILY_TABLE}")
+                database.execute(f"DELETE FROM {self._MONTHLY_TABLE}")
+                database.execute(f"INSERT INTO {self._DAILY_TABLE} SELECT year, month, day, count(*) "
+                                 f"FROM {self._TABLE} GROUP BY year, month, day")
+                database.execute(f"INSERT INTO {self._MONTHLY_TABLE} SELECT year, month, count(*) "
+                                 f"FROM {self._TABLE} GROUP BY year, month")
+                database.execute(f"PRAGMA user_version = {self._SCHEMA_VERSION}")
+        except self._DATABASE_ERRORS as e:
+            raise MigratingStatsDatabaseException(e) from e
+
+        return True
+
+    def _insert(self, queries):
+        """
+        Method to insert requests and increment their counters in one transaction
+        """
+        now = datetime.now()
+        timestamp = now.strftime('%d-%m-%Y %H:%M:%S')
+
+        rows = [(timestamp, now.day, now.month, now.year, query) for query in queries]
+
+        try:
+            with self._database.transaction() as database:
+                database.insert_many(self._TABLE, rows)
+                database.execute(f"INSERT INTO {self._DAILY_TABLE} VALUES (?, ?, ?, ?) "
+                                 "ON CONFLICT (year, month, day) DO UPDATE SET requests = requests + excluded.requests",
+                                 (now.year, now.month, now.day, len(rows)))
+                database.execute(f"INSERT INTO {self._MONTHLY_TABLE} VALUES (?, ?, ?) "
+                                 "ON CONFLICT (year, month) DO UPDATE SET requests = requests + excluded.requests",
+                                 (now.year, now.month, len(rows)))
+        except self._DATABASE_ERRORS as e:
+            raise InsertingStatsInDatabaseException(e) from e
+
     def update(self, query):
         """
         Overrides update method
         """
+        self._insert([query])
 
-        now = datetime.now().strftime('%d-%m-%Y %H:%M:%S')
-        day = datetime.now().day
-        month = datetime.now().month
-        year = datetime.now().year
-
-        if not self._database.insert(self._TABLE, f"'{now}', {day}, {month}, {year}, '{query}'"):
-            raise InsertingStatsInDatabaseException()
+    def update_many(self, queries):
+        """
+        Method to save many requests in one transaction
+        """
+        if queries:
+            self._insert(queries)
 
     def get_current_month_requests(self):
         """
         Function to fecth current month requests
         """
-        month = datetime.now().month
-        year = datetime.now().year
-        
-        res = self._database.select(self._TABLE, "count(*)", f"month = {month} and year = {year}")
-
-        if res:
-            return res[0][0]
-       
-        raise FetchingStatsInDatabaseException()
-
+        now = datetime.now()
 
+        try:
+            res = self._database.select(self._MONTHLY_TABLE, "requests", "year = ? and month = ?",
+                                        (now.year, now.month))
+        except self._DATABASE_ERRORS as e:
+            raise FetchingStatsInDatabaseException(e) from e
 
+        # No row until the first request of the month
+        return res[0][0] if res else 0
 
-        
+    def get_day_requests(self, year, month, day):
+        """
+        Function to fetch requests of a day
+        """
+        try:
+            res = self._database.select(self._DAILY_TABLE, "requests", "year = ? and month = ? and day = ?",
+                                        (year, month, day))
+        except self._DATABASE_ERRORS as e:
+            raise FetchingStatsInDatabaseException(e) from e
 
-    
-    
+        return res[0][0] if res else 0
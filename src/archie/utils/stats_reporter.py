@@ -0,0 +1,185 @@
+# encoding:utf-8
+"""
+stats_reporter.py - File that contains background speech to text stats reporter
+"""
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+import requests
+
+
+class StatsReporter():
+    """
+    Class to report speech to text requests to the monitor service off the critical path.
+    Queries are queued and flushed in batches by a background thread, periodically
+    or on close. The current month counter is kept locally and reconciled with the
+    service after every flush.
+    """
+
+    # Queue sentinel to stop the reporter thread
+    _STOP = object()
+
+    def __init__(self, host="localhost", port=30153, flush_interval=5.0, batch_size=20,
+                 timeout=2.0, max_pending=1000) -> None:
+        """
+        Default constructor
+        @flush_interval: max seconds a query waits before being flushed
+        @batch_size: queued queries that trigger a flush
+        @timeout: monitor service requests timeout
+        @max_pending: max unsent queries kept while the service is unreachable
+        """
+        # Initialize logger name
+        self._logger = logging.getLogger(self.__class__.__name__)
+        # Set monitor service url
+        self._url = f"http://{host}:{port}"
+        # Set flush parameters
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._timeout = timeout
+        self._max_pending = max_pending
+        # Queries waiting to be sent
+        self._queue = queue.Queue()
+        # Queries of failed flushes, retried on next flush
+        self._pending = []
+        # Current month and its requests, guarded by lock
+        self._lock = threading.Lock()
+        self._month = self._current_month()
+        self._requests = 0
+        # Keep-alive connection to the monitor service
+        self._session = requests.Session()
+        # Reporter thread
+        self._thread = None
+
+    def __repr__(self) -> str:
+        """ Return a printed version """
+        return f"{self.__class__.__name__}, url: {self._url}, requests: {self._requests}"
+
+    @property
+    def current_month_requests(self):
+        """
+        Return current_month_requests
+        """
+        with self._lock:
+            self._rollover()
+            return self._requests
+
+    @staticmethod
+    def _current_month():
+        """
+        Method to get current (year, month)
+        """
+        now = datetime.now()
+        return now.year, now.month
+
+    def _rollover(self):
+        """
+        Method to reset the counter when a new month starts. Lock must be held.
+        """
+        month = self._current_month()
+        if month != self._month:
+            self._month = month
+            self._requests = 0
+
+    def start(self):
+        """
+        Method to start the reporter thread
+        """
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(target=self._run, name="StatsReporter", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """
+        Method to flush queued queries and stop the reporter thread
+        """
+        if self._thread is None:
+            return
+
+        self._queue.put(self._STOP)
+        self._thread.join()
+        self._thread = None
+        self._session.close()
+
+    def report(self, query):
+        """
+        Method to queue a recognized query. It never blocks on the monitor service.
+        """
+        with self._lock:
+            self._rollover()
+            self._requests += 1
+
+        self._queue.put(query)
+
+    def _run(self):
+        """
+        Reporter thread loop
+        """
+        # Initial counter from the service
+        self._reconcile()
+
+        stop = False
+        while not stop:
+            batch = []
+            deadline = None
+            # Collect a batch until it is full or the oldest query waited flush interval
+            while len(batch) < self._batch_size:
+                try:
+                    timeout = None if deadline is None else max(0, deadline - time.monotonic())
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+                if item is self._STOP:
+                    stop = True
+                    break
+
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self._flush_interval
+
+            if batch or (stop and self._pending):
+                self._flush(batch)
+
+    def _flush(self, batch):
+        """
+        Method to send a batch of queries to the monitor service
+        """
+        queries = self._pending + batch
+        self._pending = []
+
+        try:
+            res = self._session.post(f"{self._url}/stats/requests/update",
+                                     json={"queries": queries}, timeout=self._timeout)
+            res.raise_for_status()
+        except Exception as e:
+            self._logger.error(f"Unable to report stats: {e}")
+            # Keep unsent queries for next flush
+            self._pending = queries[-self._max_pending:]
+            return
+
+        self._logger.debug(f"{len(queries)} requests reported")
+        self._reconcile()
+
+    def _reconcile(self):
+        """
+        Method to set the local counter from the service, plus queries not yet sent
+        """
+        try:
+            res = self._session.get(f"{self._url}/stats/requests/getcurrent", timeout=self._timeout)
+            response = res.json()
+        except Exception as e:
+            self._logger.error(f"Unable to fetch requests stats: {e}")
+            return
+
+        if response.get("res") != "0":
+            self._logger.error("Unable to fetch requests stats from database")
+            return
+
+        with self._lock:
+            self._rollover()
+            self._requests = int(response.get("val")) + self._queue.qsize() + len(self._pending)
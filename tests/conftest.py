@@ -0,0 +1,9 @@
+# encoding:utf-8
+"""
+conftest.py - File that contains pytest configuration, so tests import the archie package from src
+"""
+
+import sys
+from os import path
+
+sys.path.insert(0, path.join(path.dirname(path.dirname(path.abspath(__file__))), "src"))
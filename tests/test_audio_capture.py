@@ -0,0 +1,96 @@
+# encoding:utf-8
+"""
+test_audio_capture.py - File that contains persistent audio capture tests
+"""
+
+import threading
+import time
+import numpy as np
+import pytest
+
+pytest.importorskip("speech_recognition")
+
+from archie.lib.engine.audio_capture import (AudioCapture, AudioCaptureStoppedException, AudioRingBuffer,
+                                             FakeBackend)
+
+SAMPLE_RATE = 16000
+
+
+def ramp(start, count):
+    """ Return consecutive samples """
+    return np.arange(start, start + count, dtype=np.int16)
+
+
+def test_ring_buffer_wraparound():
+    """ Samples written across the end of the buffer are read back in order """
+    buffer = AudioRingBuffer(8)
+    buffer.write(ramp(0, 6))
+    samples, position = buffer.read(0, 6)
+
+    buffer.write(ramp(6, 5))
+    wrapped, position = buffer.read(position, 10)
+
+    np.testing.assert_array_equal(samples, ramp(0, 6))
+    np.testing.assert_array_equal(wrapped, ramp(6, 5))
+    assert position == buffer.written == 11
+
+
+def test_ring_buffer_overrun_drops_oldest_samples():
+    """ A reader left behind by more than the capacity skips the overwritten samples """
+    buffer = AudioRingBuffer(8)
+    buffer.write(ramp(0, 5))
+    buffer.write(ramp(5, 10))
+
+    samples, position = buffer.read(0, 20)
+
+    np.testing.assert_array_equal(samples, ramp(7, 8))
+    assert position == 15
+
+    # Writes larger than the capacity keep their last samples
+    buffer.write(ramp(15, 20))
+    samples, position = buffer.read(position, 20)
+
+    np.testing.assert_array_equal(samples, ramp(27, 8))
+    assert position == 35
+
+
+def test_read_blocks_until_capture_stops():
+    """ A read waiting for samples returns with an error once the capture stops """
+    capture = AudioCapture(FakeBackend(realtime=False))
+    capture.start()
+    errors = []
+
+    def read():
+        try:
+            capture.read(capture.position, SAMPLE_RATE * 10)
+        except AudioCaptureStoppedException as e:
+            errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    time.sleep(0.2)
+
+    assert reader.is_alive()
+
+    capture.stop()
+    reader.join(timeout=2)
+
+    assert not reader.is_alive()
+    assert len(errors) == 1
+
+
+def test_source_reads_pre_roll_first():
+    """ Audio captured before entering the source is read first """
+    said = ramp(1, SAMPLE_RATE // 2)
+    capture = AudioCapture(FakeBackend(said, realtime=False))
+    capture.start()
+    try:
+        while capture.position < len(said):
+            time.sleep(0.01)
+
+        with capture.source(pre_roll=1) as source:
+            frame_data = source.stream.read(len(said))
+    finally:
+        capture.stop()
+
+    np.testing.assert_array_equal(np.frombuffer(frame_data, dtype='<i2'), said)
@@ -0,0 +1,57 @@
+# encoding:utf-8
+"""
+test_batcher.py - File that contains predictions micro-batcher tests
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from archie.services.weather_rain.batcher import MicroBatcher, MicroBatcherStoppedException
+
+
+def test_predict_batches_concurrent_queries():
+    """ Concurrent queries share one inference and get their own prediction """
+    batches = []
+
+    def predict(queries):
+        batches.append(queries)
+        return [len(query) for query in queries]
+
+    async def run():
+        with ThreadPoolExecutor(1) as executor:
+            batcher = MicroBatcher(predict, executor, max_wait_ms=50)
+            batcher.start()
+            predictions = await batcher.predict_many(["a", "bb", "ccc"])
+            await batcher.stop()
+        return predictions
+
+    assert asyncio.run(run()) == [1, 2, 3]
+    assert batches == [["a", "bb", "ccc"]]
+
+
+def test_stop_fails_pending_requests():
+    """ Requests in the running batch and in the queue fail on stop instead of awaiting forever """
+    release = threading.Event()
+
+    def predict(queries):
+        release.wait()
+        return [0] * len(queries)
+
+    async def run():
+        with ThreadPoolExecutor(1) as executor:
+            batcher = MicroBatcher(predict, executor, max_batch_size=1, max_wait_ms=0)
+            batcher.start()
+            running = asyncio.ensure_future(batcher.predict("running"))
+            waiting = asyncio.ensure_future(batcher.predict("waiting"))
+            await asyncio.sleep(0.1)
+
+            await batcher.stop()
+            release.set()
+            results = await asyncio.wait_for(asyncio.gather(running, waiting, return_exceptions=True), 1)
+
+            with pytest.raises(MicroBatcherStoppedException):
+                await batcher.predict("late")
+        return results
+
+    assert all(isinstance(result, MicroBatcherStoppedException) for result in asyncio.run(run()))
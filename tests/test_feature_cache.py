@@ -0,0 +1,93 @@
+# encoding:utf-8
+"""
+test_feature_cache.py - File that contains speech features cache tests
+"""
+
+import os
+import numpy as np
+from archie.lib.recognition.feature_cache import FeatureCache
+
+PARAMETERS = {"numcep": 20}
+
+
+def sample_file(tmp_path, name):
+    """ Return the path of a sample file with distinct contents """
+    sample = tmp_path / f"{name}.wav"
+    sample.write_bytes(name.encode())
+    return str(sample)
+
+
+def test_hits_and_misses_return_same_dtype(tmp_path):
+    """ A miss returns the stored float32 block, as later hits do """
+    cache = FeatureCache(str(tmp_path / "cache"))
+    sample = sample_file(tmp_path, "sample")
+    extracted = np.random.default_rng(0).normal(size=(10, 40))
+
+    miss = cache.features(sample, PARAMETERS, lambda _: extracted)
+    hit = cache.features(sample, PARAMETERS, lambda _: None)
+
+    assert miss.dtype == hit.dtype == np.float32
+    np.testing.assert_array_equal(miss, hit)
+
+
+def test_put_evicts_least_recently_used_entries(tmp_path):
+    """ Entries are evicted once the cache exceeds its max size, oldest first, down to the evict ratio """
+    block = np.zeros((100, 40))
+    cache_path = tmp_path / "cache"
+    cache = FeatureCache(str(cache_path), max_size=3 * (block.size * 4 + 128))
+
+    for index in range(4):
+        cache.put(f"entry{index}", block)
+        os.utime(cache_path / f"entry{index}.npy", (index, index))
+
+    assert cache.get("entry0") is None and cache.get("entry1") is None
+    assert cache.get("entry2") is not None and cache.get("entry3") is not None
+
+
+def test_put_scans_cache_folder_once_per_share_written(tmp_path, monkeypatch):
+    """ The folder is listed once the process wrote the scan share of max size """
+    block = np.zeros((100, 40))
+    # Scan share is 10 blocks
+    cache = FeatureCache(str(tmp_path / "cache"), max_size=1000 * (block.size * 4 + 128))
+    scans = []
+    monkeypatch.setattr(cache, "_entries", lambda: scans.append(1) or [])
+
+    for index in range(10):
+        cache.put(f"entry{index}", block)
+    # Replacing an entry does not grow the cache
+    cache.put("entry0", block)
+
+    assert not scans
+
+    cache.put("entry10", block)
+
+    assert len(scans) == 1
+
+
+def test_concurrent_processes_share_max_size(tmp_path):
+    """ Entries written by every process count towards max size """
+    block = np.zeros((100, 40))
+    entry_size = block.size * 4 + 128
+    cache_path = str(tmp_path / "cache")
+    # One cache per training process, scan share is 2 blocks
+    caches = [FeatureCache(cache_path, max_size=200 * entry_size) for _ in range(2)]
+
+    for index in range(150):
+        for worker, cache in enumerate(caches):
+            cache.put(f"entry{worker}-{index}", block)
+
+    size = sum(os.path.getsize(os.path.join(cache_path, entry)) for entry in os.listdir(cache_path))
+    assert size <= (200 + 2 * 3) * entry_size
+
+
+def test_existing_cache_over_max_size_is_evicted(tmp_path):
+    """ Entries stored by a previous run count towards max size """
+    block = np.zeros((100, 40))
+    cache_path = str(tmp_path / "cache")
+    cache = FeatureCache(cache_path)
+    for index in range(4):
+        cache.put(f"entry{index}", block)
+
+    FeatureCache(cache_path, max_size=2 * (block.size * 4 + 128))
+
+    assert len(os.listdir(cache_path)) <= 2
@@ -0,0 +1,60 @@
+# encoding:utf-8
+"""
+test_model_bank.py - File that contains speaker model bank tests
+"""
+
+import numpy as np
+import pytest
+from archie.lib.recognition.model_bank import ModelBank, ModelBankEmptyException
+from archie.lib.recognition.speaker_recognition import SpeakerRecognition
+
+
+def test_empty_bank_raises_on_score():
+    """ An empty bank is built, and raises ModelBankEmptyException only when scoring """
+    bank = ModelBank.from_components([], [], [], [])
+
+    assert len(bank) == 0
+    with pytest.raises(ModelBankEmptyException):
+        bank.score(np.zeros((10, 13)))
+
+
+def test_empty_bank_save_and_load(tmp_path):
+    """ An empty bank survives a save and load round trip """
+    bank_file = str(tmp_path / ModelBank.FILE_NAME)
+    ModelBank.from_components([], [], [], []).save(bank_file)
+
+    bank = ModelBank.load(bank_file)
+
+    assert len(bank) == 0
+    with pytest.raises(ModelBankEmptyException):
+        bank.score(np.zeros((10, 13)))
+
+
+def test_speaker_recognition_starts_on_empty_models_path(tmp_path):
+    """ Speaker recognition starts without models and raises on identification """
+    recognition = SpeakerRecognition(str(tmp_path))
+
+    with pytest.raises(ModelBankEmptyException):
+        recognition.find_speaker_from_buffer(np.zeros(16000, dtype=np.int16), 16000)
+
+
+def test_bank_scores_every_speaker():
+    """ Every speaker gets a score, the one the frames come from the highest """
+    rng = np.random.default_rng(0)
+    means = [np.zeros((2, 3)), np.full((1, 3), 5.0)]
+    bank = ModelBank.from_components(["near", "far"], [np.array([0.5, 0.5]), np.array([1.0])],
+                                     means, [np.ones((2, 3)), np.ones((1, 3))])
+
+    scores = bank.score(rng.normal(size=(50, 3)))
+
+    assert scores.shape == (2,)
+    assert bank.speakers[int(np.argmax(scores))] == "near"
+
+
+def test_long_speaker_names_survive_save_and_load(tmp_path):
+    """ Speaker names are stored whole, whatever their length """
+    bank_file = str(tmp_path / ModelBank.FILE_NAME)
+    speakers = ["a" * 100, "marco"]
+    ModelBank.from_components(speakers, [np.ones(1)] * 2, [np.zeros((1, 3))] * 2, [np.ones((1, 3))] * 2).save(bank_file)
+
+    assert ModelBank.load(bank_file).speakers == speakers
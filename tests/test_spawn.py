@@ -0,0 +1,103 @@
+# encoding:utf-8
+"""
+test_spawn.py - File that contains services supervision tests
+"""
+
+import socket
+import sys
+import threading
+from types import SimpleNamespace
+import pytest
+from archie.services.spawn import SpawnServices
+
+# Service answering its readiness endpoint, unless READY is False
+SERVICE = '''
+import argparse
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+READY = {ready}
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--host")
+parser.add_argument("--port", type=int)
+args = parser.parse_args()
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200 if READY else 503)
+        self.end_headers()
+
+
+HTTPServer((args.host, args.port), Handler).serve_forever()
+'''
+
+
+def free_port():
+    """ Return a free local port """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def spawn(tmp_path, request):
+    """ Spawned and ready service, becoming not ready on restart if the test parameter is False """
+    (tmp_path / "fake").mkdir()
+    (tmp_path / "fake" / "service.py").write_text(SERVICE.format(ready=True))
+    config = SimpleNamespace(services=SimpleNamespace(python_exe=sys.executable, path=str(tmp_path), services={
+        "fake": {"enabled": True, "host": "127.0.0.1", "port": free_port(), "ready_timeout": 5}}))
+    spawn = SpawnServices(config)
+    spawn.run()
+    spawn.wait_ready()
+    (tmp_path / "fake" / "service.py").write_text(SERVICE.format(ready=request.param))
+    yield spawn
+    spawn.stop()
+
+
+def restart(spawn):
+    """ Kill the service and restart it as the supervisor does """
+    service = spawn._spawned_services["fake"]
+    service.process.kill()
+    service.process.wait()
+    service.restart_delay = 0
+    spawn._check_service(service)
+    spawn._check_service(service)
+
+    return service
+
+
+def wait_probe():
+    """ Wait for the readiness probe of the restarted service """
+    for thread in threading.enumerate():
+        if thread.name == "ReadinessProbe-fake":
+            thread.join()
+
+
+@pytest.mark.parametrize("spawn", [True], indirect=True)
+def test_restarted_service_is_ready_after_probe(spawn):
+    """ A restarted service is ready once it answers its readiness endpoint """
+    service = restart(spawn)
+    wait_probe()
+
+    assert service.restarts == 1
+    assert service.ready_at is not None and service.process.poll() is None
+
+
+@pytest.mark.parametrize("spawn", [False], indirect=True)
+def test_restarted_service_not_ready_keeps_backoff(spawn, monkeypatch):
+    """ A restarted service never ready is killed and its backoff is not reset """
+    monkeypatch.setitem(spawn._services["fake"], "ready_timeout", 1)
+    monkeypatch.setattr(SpawnServices, "_STABLE_UPTIME", 0)
+    service = restart(spawn)
+    service.restart_delay = 8
+
+    # Running but not ready, backoff is kept
+    spawn._check_service(service)
+    assert service.process.poll() is None and service.restart_delay == 8
+
+    wait_probe()
+
+    assert service.ready_at is None
+    assert service.process.wait(timeout=5) is not None
@@ -0,0 +1,40 @@
+# encoding:utf-8
+"""
+test_statistics.py - File that contains speech to text statistics tests
+"""
+
+import shutil
+from datetime import datetime
+from os import path
+from archie.utils.statistics import SpeechToTextStats
+
+DATABASE = path.join(path.dirname(path.dirname(path.abspath(__file__))), "data", "db", "statistics.db")
+
+
+def test_migrate_empty_database(tmp_path):
+    """ A new database gets every table and counts requests """
+    stats = SpeechToTextStats(str(tmp_path), "statistics.db")
+
+    assert stats.migrate()
+    assert stats.schema_version() == SpeechToTextStats._SCHEMA_VERSION
+    assert stats.get_current_month_requests() == 0
+
+    stats.update_many(["hola", "adios"])
+
+    assert stats.get_current_month_requests() == 2
+    assert not stats.migrate()
+    stats.close()
+
+
+def test_migrate_backfills_existing_requests(tmp_path):
+    """ Counters of a database with requests are backfilled """
+    shutil.copy(DATABASE, tmp_path / "statistics.db")
+    stats = SpeechToTextStats(str(tmp_path), "statistics.db")
+    requests = stats._database.select(stats._TABLE, "year, month, day")
+
+    assert stats.migrate()
+
+    year, month, day = requests[0] if requests else (datetime.now().year, 1, 1)
+    assert stats.get_day_requests(year, month, day) == sum(
+        1 for request in requests if tuple(request) == (year, month, day))
+    stats.close()
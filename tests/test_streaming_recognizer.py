@@ -0,0 +1,166 @@
+# encoding:utf-8
+"""
+test_streaming_recognizer.py - File that contains streaming recognizer tests against an in-process speech service
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+import grpc
+import pytest
+from google.cloud import speech
+from archie.lib.engine.streaming_recognizer import StreamingRecognizer, StreamingRecognizerTimeoutException
+
+# Chunks read from the fake microphone before failing, so a stream never closed by the client fails the test
+MAX_CHUNKS = 50
+
+
+class FakeSpeechService():
+    """
+    Class that serves Speech StreamingRecognize.
+    Interim hypotheses are sent from the second audio chunk, end of utterance on the
+    fourth one, then the final result once the client closes its request stream.
+    Without words, audio is consumed until the client closes the stream.
+    """
+
+    def __init__(self, words) -> None:
+        """
+        Default constructor
+        @words: words said in every stream, one per audio chunk from the second one
+        """
+        self._words = words
+        # Streaming configuration and audio received on every stream
+        self.configs = []
+        self.audio = []
+
+    def streaming_recognize(self, request_iterator, context):
+        """
+        StreamingRecognize handler
+        """
+        self.configs.append(next(request_iterator).streaming_config)
+        self.audio.append(b"")
+        said = []
+        for chunk, request in enumerate(request_iterator):
+            self.audio[-1] += request.audio_content
+            if not self._words:
+                continue
+            if 1 <= chunk < 1 + len(self._words):
+                said.append(self._words[chunk - 1])
+                yield speech.StreamingRecognizeResponse(results=[speech.StreamingRecognitionResult(
+                    alternatives=[speech.SpeechRecognitionAlternative(transcript=" ".join(said))])])
+            if chunk == 3:
+                yield speech.StreamingRecognizeResponse(
+                    speech_event_type=speech.StreamingRecognizeResponse.SpeechEventType.END_OF_SINGLE_UTTERANCE)
+
+        if self._words:
+            yield speech.StreamingRecognizeResponse(results=[speech.StreamingRecognitionResult(
+                alternatives=[speech.SpeechRecognitionAlternative(transcript=" ".join(self._words))],
+                is_final=True)])
+
+
+class FakeMicrophone():
+    """
+    Class that returns numbered chunks
+    """
+
+    def __init__(self, delay=0) -> None:
+        """
+        Default constructor
+        @delay: seconds to read a chunk
+        """
+        self.chunks = 0
+        self._delay = delay
+
+    def read(self):
+        """
+        Method to read next chunk
+        """
+        time.sleep(self._delay)
+        self.chunks += 1
+        if self.chunks > MAX_CHUNKS:
+            raise RuntimeError("Stream not closed after end of utterance")
+
+        return self.chunks.to_bytes(2, "little") * 160
+
+
+def serve(service):
+    """
+    Function to start an in-process server of the speech service
+    @return server and its host:port
+    """
+    server = grpc.server(ThreadPoolExecutor(max_workers=4))
+    server.add_generic_rpc_handlers([grpc.method_handlers_generic_handler("google.cloud.speech.v1.Speech", {
+        "StreamingRecognize": grpc.stream_stream_rpc_method_handler(
+            service.streaming_recognize,
+            request_deserializer=speech.StreamingRecognizeRequest.deserialize,
+            response_serializer=speech.StreamingRecognizeResponse.serialize)})])
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+
+    return server, f"localhost:{port}"
+
+
+@pytest.fixture
+def speech_service(request):
+    """ Speech service saying the words of the test parameter """
+    service = FakeSpeechService(request.param)
+    server, endpoint = serve(service)
+    yield service, endpoint
+    server.stop(None)
+
+
+@pytest.mark.parametrize("speech_service", [["hola", "mundo"]], indirect=True)
+def test_recognize_interim_and_final_results(speech_service):
+    """ Interim hypotheses are surfaced and the final result is the transcription """
+    service, endpoint = speech_service
+    microphone = FakeMicrophone(0.01)
+    interims = []
+
+    transcription, frame_data = StreamingRecognizer("es-es", api_endpoint=endpoint).recognize(
+        microphone.read, 16000, on_interim=interims.append)
+
+    assert transcription == "hola mundo"
+    assert interims == ["hola", "hola mundo"]
+    assert service.configs[0].interim_results and service.configs[0].single_utterance
+    assert service.configs[0].config.sample_rate_hertz == 16000
+    assert service.configs[0].config.language_code == "es-es"
+    # Every captured chunk is sent and returned for speaker recognition
+    assert frame_data == service.audio[0]
+
+
+@pytest.mark.parametrize("speech_service", [["hola"]], indirect=True)
+def test_recognize_stops_capturing_at_end_of_utterance(speech_service):
+    """ Audio stops being read once the end of utterance event is received """
+    _, endpoint = speech_service
+    microphone = FakeMicrophone(0.01)
+
+    transcription, frame_data = StreamingRecognizer(api_endpoint=endpoint).recognize(microphone.read, 16000)
+
+    assert transcription == "hola"
+    # End of utterance is sent after the fourth chunk, chunks in flight may still be read
+    assert 4 <= microphone.chunks < MAX_CHUNKS
+    assert len(frame_data) == microphone.chunks * 320
+
+
+@pytest.mark.parametrize("speech_service", [["hola"]], indirect=True)
+def test_recognize_restarts_stream_on_every_utterance(speech_service):
+    """ A new stream with its own configuration and audio is opened on every call """
+    service, endpoint = speech_service
+    recognizer = StreamingRecognizer(api_endpoint=endpoint)
+
+    first = recognizer.recognize(FakeMicrophone(0.01).read, 16000)
+    second = recognizer.recognize(FakeMicrophone(0.01).read, 16000)
+
+    assert first[0] == second[0] == "hola"
+    assert len(service.configs) == 2
+    assert service.audio[0] == first[1] and service.audio[1] == second[1]
+
+
+@pytest.mark.parametrize("speech_service", [[]], indirect=True)
+def test_recognize_timeout_without_speech(speech_service):
+    """ Stream is closed and timeout raised when no speech starts before timeout """
+    service, endpoint = speech_service
+
+    with pytest.raises(StreamingRecognizerTimeoutException):
+        StreamingRecognizer(api_endpoint=endpoint).recognize(FakeMicrophone(0.02).read, 16000, timeout=0.2)
+
+    assert len(service.configs) == 1
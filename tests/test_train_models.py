@@ -0,0 +1,71 @@
+# encoding:utf-8
+"""
+test_train_models.py - File that contains speaker models trainer tests
+"""
+
+import pickle
+from os import path
+import numpy as np
+from scipy.io.wavfile import write
+from sklearn.mixture import GaussianMixture
+from archie.lib.recognition.model_bank import ModelBank
+from archie.lib.recognition.feature_cache import FeatureCache
+from archie.lib.recognition.train_models import TrainModels, _sample_features
+
+
+def test_train_without_matching_speakers_saves_nothing(tmp_path):
+    """ No model bank is written when no speaker folder matches """
+    samples_path = tmp_path / "samples"
+    models_path = tmp_path / "models"
+    (samples_path / "marco").mkdir(parents=True)
+    models_path.mkdir()
+
+    TrainModels(str(samples_path), str(models_path), 5).train(speakers=["nobody"])
+
+    assert not path.exists(models_path / ModelBank.FILE_NAME)
+
+
+def test_train_without_enough_samples_saves_nothing(tmp_path):
+    """ No model bank is written when no speaker folder has enough samples """
+    samples_path = tmp_path / "samples"
+    models_path = tmp_path / "models"
+    (samples_path / "marco").mkdir(parents=True)
+    (samples_path / "marco" / "sample-1.wav").write_bytes(b"")
+    models_path.mkdir()
+
+    TrainModels(str(samples_path), str(models_path), 5).train()
+
+    assert not path.exists(models_path / ModelBank.FILE_NAME)
+
+
+def test_retrained_speaker_keeps_converted_name(tmp_path):
+    """ A speaker converted from a legacy model file and retrained from its samples folder has one name """
+    samples_path = tmp_path / "samples"
+    models_path = tmp_path / "models"
+    (samples_path / "marco-1").mkdir(parents=True)
+    models_path.mkdir()
+    rng = np.random.default_rng(0)
+    for index in range(5):
+        write(str(samples_path / "marco-1" / f"sample-{index}.wav"), 16000,
+              rng.normal(0, 1000, 16000).astype(np.int16))
+    with open(models_path / "marco-1.gmm", "wb") as dump:
+        pickle.dump(GaussianMixture(2, covariance_type='diag').fit(rng.normal(size=(50, 40))), dump)
+    ModelBank.from_gmm_files(str(models_path)).save(str(models_path / ModelBank.FILE_NAME))
+
+    TrainModels(str(samples_path), str(models_path), 5).train()
+
+    assert ModelBank.load(str(models_path / ModelBank.FILE_NAME)).speakers == ["marco"]
+
+
+def test_sample_features_dtype_does_not_depend_on_cache(tmp_path):
+    """ Features are float32 with and without the cache, cold or warm """
+    sample = str(tmp_path / "sample.wav")
+    write(sample, 16000, np.random.default_rng(0).normal(0, 1000, 16000).astype(np.int16))
+    cache = FeatureCache(str(tmp_path / "cache"))
+
+    uncached, = _sample_features([sample])
+    cold, = _sample_features([sample], cache)
+    warm, = _sample_features([sample], cache)
+
+    assert uncached.dtype == cold.dtype == warm.dtype == np.float32
+    np.testing.assert_array_equal(uncached, warm)
@@ -0,0 +1,48 @@
+# encoding:utf-8
+"""
+test_voice_activity.py - File that contains voice activity detector tests
+"""
+
+import numpy as np
+from archie.lib.engine.voice_activity import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+
+
+def silence(seconds):
+    """ Return low noise samples """
+    return np.random.default_rng(0).normal(0, 10, int(seconds * SAMPLE_RATE)).astype(np.int16)
+
+
+def tone(seconds):
+    """ Return voice band tone samples """
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (8000 * np.sin(2 * np.pi * 300 * t)).astype(np.int16)
+
+
+def two_utterances():
+    """ Return two utterances split by a pause longer than the hangover """
+    return np.concatenate((silence(0.5), tone(0.6), silence(1), tone(0.6), silence(1)))
+
+
+def test_process_returns_every_completed_segment():
+    """ Every segment completed by a chunk is returned """
+    vad = VoiceActivityDetector(SAMPLE_RATE, hangover_ms=300)
+
+    assert len(vad.process(two_utterances())) == 2
+
+
+def test_process_first_keeps_audio_after_first_segment():
+    """ Only the first segment is returned and the audio after it is not lost """
+    vad = VoiceActivityDetector(SAMPLE_RATE, hangover_ms=300)
+
+    segments = vad.process(two_utterances(), first=True)
+    first_bounds = vad.last_bounds
+
+    assert len(segments) == 1
+    assert first_bounds[0] < 0.5 * SAMPLE_RATE < first_bounds[1] < 1.5 * SAMPLE_RATE
+
+    segments = vad.process(b"", first=True)
+
+    assert len(segments) == 1
+    assert vad.last_bounds[0] > first_bounds[1]
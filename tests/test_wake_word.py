@@ -0,0 +1,54 @@
+# encoding:utf-8
+"""
+test_wake_word.py - File that contains wake word detector tests
+"""
+
+import numpy as np
+import pytest
+from scipy.io.wavfile import write
+from archie.lib.recognition.wake_word import WakeWordDetector
+
+SAMPLE_RATE = 16000
+
+
+def chirp(start, sweep):
+    """ Return a chirp from start Hz, sweeping sweep Hz per second """
+    t = np.arange(int(0.5 * SAMPLE_RATE)) / SAMPLE_RATE
+    return 8000 * np.sin(2 * np.pi * (start + sweep * t) * t)
+
+
+def recording(audio, seed):
+    """ Return audio recorded with noise """
+    return (audio + np.random.default_rng(seed).normal(0, 500, len(audio))).astype(np.int16)
+
+
+def record_templates(templates_path, count):
+    """ Write wake word recordings, the same chirp with different noise """
+    templates_path.mkdir()
+    for index in range(count):
+        write(str(templates_path / f"template-{index}.wav"), SAMPLE_RATE, recording(chirp(300, 600), index))
+
+
+@pytest.fixture
+def detector(tmp_path):
+    """ Detector with the threshold calibrated from four recordings """
+    record_templates(tmp_path / "wake_word", 4)
+    return WakeWordDetector(str(tmp_path / "wake_word"))
+
+
+def test_detect_accepts_wake_word(detector):
+    """ A new recording of the wake word is accepted """
+    assert detector.detect(recording(chirp(300, 600), 10).tobytes(), SAMPLE_RATE)
+
+
+def test_detect_rejects_other_audio(detector):
+    """ Noise and a different word are rejected """
+    assert not detector.detect(recording(np.zeros(SAMPLE_RATE), 11), SAMPLE_RATE)
+    assert not detector.detect(recording(chirp(1500, -1200), 12), SAMPLE_RATE)
+
+
+def test_configured_threshold_is_not_calibrated(tmp_path):
+    """ A configured threshold is used as is """
+    record_templates(tmp_path / "wake_word", 1)
+
+    assert WakeWordDetector(str(tmp_path / "wake_word"), threshold=7)._threshold == 7